@@ -1,307 +1,181 @@
-import sqlite3
-import os
-from flask import Flask, render_template, request, redirect, url_for, session, g
-
-# ============================================================
-# 1. CONFIGURACIÓN DE LA APLICACIÓN
-# ============================================================
-app = Flask(__name__)
-app.secret_key = "supersecreto123"  # Cambia en producción
-DATABASE = os.path.join(app.root_path, "database.db")
-
-# ============================================================
-# 2. BASE DE DATOS (SQLite)
-# ============================================================
-def get_db():
-    db = getattr(g, "_database", None)
-    if db is None:
-        db = g._database = sqlite3.connect(DATABASE)
-        db.row_factory = sqlite3.Row
-    return db
-
-@app.teardown_appcontext
-def close_connection(exception):
-    db = getattr(g, "_database", None)
-    if db is not None:
-        db.close()
-
-def init_db():
-    db = get_db()
-    try:
-        with app.open_resource("schema.sql", mode="r", encoding="utf-8") as f:
-            db.executescript(f.read())
-        db.commit()
-    except FileNotFoundError:
-        print("ADVERTENCIA: No se encontró 'schema.sql'. La base de datos no se inicializó.")
-
-# ============================================================
-# 3. DECORADOR ADMIN
-# ============================================================
-def admin_required(func):
-    def wrapper(*args, **kwargs):
-        if session.get("user_email") != "admin@pixsoft.com":
-            return "No tienes permisos para acceder a esta página", 403
-        return func(*args, **kwargs)
-    wrapper.__name__ = func.__name__
-    return wrapper
-
-# ============================================================
-# 4. RUTAS PÚBLICAS
-# ============================================================
-@app.route("/")
-def index():
-    db = get_db()
-    productos = db.execute("""
-        SELECT p.*, c.nombre AS categoria_nombre
-        FROM productos p
-        LEFT JOIN categorias c ON p.categoria_id = c.id
-        ORDER BY p.id DESC
-    """).fetchall()
-    return render_template("index.html", productos=productos)
-
-@app.route("/ayuda")
-def ayuda():
-    return render_template("ayuda.html")
+import importlib
+import time
+import click
+from flask import Flask
+from config import Config
+from models import db as modelos_db
+from models.db import get_db, get_db_lectura, get_cache, init_db
+from models.catalogo import reindexar_busqueda
+from models.migraciones import migrar, descubrir, aplicadas, version_actual
+from models.ventas import reconstruir_ventas
+from models.importacion import leer_archivo, formato_de, importar_productos, exportar_productos
+from models.tareas import mantenimiento, resumen_tareas
+from utils.fragmentos import FragmentCacheExtension
+from utils.imagenes import srcset, backfill_derivados
+from utils.assets import registrar_assets
+from utils.media import registrar_media
+from utils.metricas import registrar_metricas
+from utils.limites import registrar_limites
+
+# ============================================================
+# 1. FÁBRICA DE LA APLICACIÓN
+# ============================================================
+def create_app(config=Config):
+    app = Flask(__name__)
+    if isinstance(config, dict):
+        app.config.from_object(Config)
+        app.config.from_mapping(config)
+    else:
+        app.config.from_object(config)
 
-@app.route("/categorias")
-def categorias():
-    db = get_db()
-    # Obtener todas las categorías
-    categorias = db.execute("SELECT id, nombre FROM categorias ORDER BY nombre").fetchall()
-    
-    # Crear un diccionario con productos por categoría
-    productos_por_categoria = {}
-    for cat in categorias:
-        productos = db.execute(
-            "SELECT * FROM productos WHERE categoria_id=? ORDER BY id DESC", (cat["id"],)
-        ).fetchall()
-        productos_por_categoria[cat["nombre"]] = productos
+    # Base de datos (pool de conexiones + caché del catálogo)
+    modelos_db.init_app(app)
+    if app.config["METRICAS"]:
+        registrar_metricas(app)
+    if app.config["LIMITES_ACTIVOS"]:
+        registrar_limites(app)
 
-    return render_template("categorias.html",
-                           categorias=categorias,
-                           productos_por_categoria=productos_por_categoria)
+    # Plantillas
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = app.extensions["cache_catalogo"]
+    app.add_template_filter(srcset)
+    app.add_template_global(variantes_imagen)
 
+    # Estáticos y medios
+    registrar_assets(app)
+    registrar_media(app, app.config["MEDIA_FOLDER"])
 
+    # Blueprints: los módulos se importan aquí, solo los configurados
+    for nombre in app.config["BLUEPRINTS"]:
+        app.register_blueprint(importlib.import_module(nombre).bp)
 
-@app.route("/pedidos")
-def pedidos():
-    return render_template("pedidos.html")
+    registrar_comandos(app)
 
-@app.route("/arriendos")
-def arriendos():
-    return render_template("arriendos.html")
+    # Solo migra si la base no está en la última versión
+    with app.app_context():
+        init_db(app)
+    return app
 
 # ============================================================
-# 5. LOGIN Y REGISTRO
+# 2. PLANTILLAS
 # ============================================================
-@app.route("/loginuser", methods=["GET", "POST"])
-def loginuser():
-    error = None
-    if request.method == "POST":
-        email = request.form["username"]
-        password = request.form["password"]
-        db = get_db()
-        user = db.execute(
-            "SELECT * FROM usuarios WHERE email=? AND password=?",
-            (email, password)
-        ).fetchone()
-        if user:
-            session["user"] = user["nombre"]
-            session["user_email"] = user["email"]
-            if user["email"] == "admin@pixsoft.com":
-                return redirect(url_for("admin_productos"))
-            return redirect(url_for("index"))
-        else:
-            error = "Usuario o contraseña incorrectos"
-    return render_template("loginuser.html", error=error)
-
-@app.route("/register", methods=["GET", "POST"])
-def register_user():
-    error = None
-    if request.method == "POST":
-        nombre = request.form["nombre"]
-        email = request.form["email"]
-        password = request.form["password"]
-        confirm_password = request.form["confirm_password"]
-        if password != confirm_password:
-            error = "Las contraseñas no coinciden"
-        else:
-            db = get_db()
-            try:
-                db.execute(
-                    "INSERT INTO usuarios (nombre, email, password) VALUES (?, ?, ?)",
-                    (nombre, email, password)
-                )
-                db.commit()
-                session["user"] = nombre
-                session["user_email"] = email
-                return redirect(url_for("index"))
-            except sqlite3.IntegrityError:
-                error = "El correo ya está registrado"
-    return render_template("register.html", error=error)
-
-@app.route("/logout")
-def logout():
-    session.pop("user", None)
-    session.pop("user_email", None)
-    return redirect(url_for("index"))
+def variantes_imagen(nombre):
+    # Derivados de imágenes fijas de las plantillas (logo, etc.)
+    db = get_db_lectura()
+    return get_cache().obtener(db, ("imagen", nombre), lambda: (db.execute(
+        "SELECT variantes FROM imagenes WHERE nombre=?", (nombre,)
+    ).fetchone() or [""])[0])
 
 # ============================================================
-# 6. CRUD PRODUCTOS (ADMIN)
+# 3. COMANDOS (flask <comando>)
 # ============================================================
-@app.route("/admin/productos")
-@admin_required
-def admin_productos():
-    db = get_db()
-    productos = db.execute("""
-        SELECT p.*, c.nombre AS categoria_nombre
-        FROM productos p
-        LEFT JOIN categorias c ON p.categoria_id = c.id
-        ORDER BY p.id DESC
-    """).fetchall()
-    return render_template("admin_productos.html", productos=productos)
-
-@app.route("/admin/productos/add", methods=["GET", "POST"])
-@admin_required
-def add_producto():
-    db = get_db()
-    categorias = db.execute("SELECT id, nombre FROM categorias ORDER BY nombre").fetchall()
-    error = None
-    if request.method == "POST":
-        nombre = request.form.get("nombre", "").strip()
-        precio = request.form.get("precio", "").strip()
-        img = request.form.get("img", "").strip()
-        categoria_id = request.form.get("categoria", "").strip()
-
-        if not nombre or not precio or not categoria_id:
-            error = "Por favor completa todos los campos obligatorios"
-        else:
-            try:
-                precio_float = float(precio)
-                db.execute(
-                    "INSERT INTO productos (nombre, precio, img, categoria_id) VALUES (?, ?, ?, ?)",
-                    (nombre, precio_float, img, categoria_id)
-                )
-                db.commit()
-                return redirect(url_for("admin_productos"))
-            except ValueError:
-                error = "El precio debe ser un número válido"
-
-    return render_template("add_producto.html", categorias=categorias, error=error)
-
-@app.route("/admin/productos/edit/<int:id>", methods=["GET", "POST"])
-@admin_required
-def edit_producto(id):
-    db = get_db()
-    categorias = db.execute("SELECT id, nombre FROM categorias ORDER BY nombre").fetchall()
-    producto = db.execute("SELECT * FROM productos WHERE id=?", (id,)).fetchone()
-    error = None
-
-    if request.method == "POST":
-        nombre = request.form.get("nombre", "").strip()
-        precio = request.form.get("precio", "").strip()
-        img = request.form.get("img", "").strip()
-        categoria_id = request.form.get("categoria", "").strip()
-
-        if not nombre or not precio or not categoria_id:
-            error = "Por favor completa todos los campos obligatorios"
-        else:
-            try:
-                precio_float = float(precio)
-                db.execute(
-                    "UPDATE productos SET nombre=?, precio=?, img=?, categoria_id=? WHERE id=?",
-                    (nombre, precio_float, img, categoria_id, id)
-                )
-                db.commit()
-                return redirect(url_for("admin_productos"))
-            except ValueError:
-                error = "El precio debe ser un número válido"
-
-    return render_template("edit_producto.html", producto=producto, categorias=categorias, error=error)
-
-@app.route("/admin/productos/delete/<int:id>")
-@admin_required
-def delete_producto(id):
-    db = get_db()
-    db.execute("DELETE FROM productos WHERE id=?", (id,))
-    db.commit()
-    return redirect(url_for("admin_productos"))
-
-# ============================================================
-# 7. RUTAS DEL CARRITO
-# ============================================================
-@app.route("/carrito")
-def carrito():
-    return render_template("carrito.html")
-
-@app.route("/confirmar_compra", methods=["POST"])
-def confirmar_compra():
-    import json
-    if not session.get("user_email"):
-        return {"success": False, "error": "Debes iniciar sesión"}, 401
-
-    try:
-        data = request.get_json()
-        if not data:
-            return {"success": False, "error": "Carrito vacío"}
+def registrar_comandos(app):
+    @app.cli.group("db")
+    def db_group():
+        """Migraciones del esquema."""
 
+    @db_group.command("upgrade")
+    @click.option("--hasta", type=int, help="Aplica solo hasta esta versión.")
+    def db_upgrade_command(hasta):
+        """Aplica las migraciones pendientes."""
         db = get_db()
-        user_email = session["user_email"]
-
-        db.execute("""
-            CREATE TABLE IF NOT EXISTS pedidos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_email TEXT,
-                producto_id INTEGER,
-                nombre TEXT,
-                precio REAL,
-                cantidad INTEGER,
-                subtotal REAL,
-                fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        db.commit()
-
-        for item in data:
-            db.execute(
-                "INSERT INTO pedidos (user_email, producto_id, nombre, precio, cantidad, subtotal) VALUES (?, ?, ?, ?, ?, ?)",
-                (user_email, item.get("id"), item.get("name"), item.get("price"), item.get("quantity"), item.get("price") * item.get("quantity"))
-            )
-        db.commit()
-
-        return {"success": True}
-    except Exception as e:
-        print("Error al confirmar compra:", e)
-        return {"success": False, "error": str(e)}
-    
-@app.route("/buscar", methods=["GET"])
-def buscar():
-    query = request.args.get("q", "").strip()
-    db = get_db()
-    if query:
-        # Busca productos por nombre o por categoría
-        productos = db.execute("""
-            SELECT p.*, c.nombre AS categoria_nombre
-            FROM productos p
-            LEFT JOIN categorias c ON p.categoria_id = c.id
-            WHERE p.nombre LIKE ? OR c.nombre LIKE ?
-            ORDER BY p.id DESC
-        """, (f"%{query}%", f"%{query}%")).fetchall()
-    else:
-        # Si no hay query, mostrar todos
-        productos = db.execute("""
-            SELECT p.*, c.nombre AS categoria_nombre
-            FROM productos p
-            LEFT JOIN categorias c ON p.categoria_id = c.id
-            ORDER BY p.id DESC
-        """).fetchall()
-
-    return render_template("index.html", productos=productos, query=query)
-
-# ============================================================
-# 8. INICIALIZACIÓN
-# ============================================================
+        hechas = migrar(db, app.config["MIGRACIONES_FOLDER"], hasta=hasta)
+        for migracion in hechas:
+            print(f"Aplicada {migracion.version:04d}_{migracion.nombre}")
+        if hechas:
+            get_cache().invalidar(db)
+        print(f"Base de datos en la versión {version_actual(db)}.")
+
+    @db_group.command("estado")
+    def db_estado_command():
+        """Muestra las migraciones aplicadas y las pendientes."""
+        hechas = {fila["version"]: fila["aplicada"] for fila in aplicadas(get_db())}
+        for migracion in descubrir(app.config["MIGRACIONES_FOLDER"]):
+            estado = hechas.get(migracion.version, "pendiente")
+            print(f"{migracion.version:04d}_{migracion.nombre:<30} {estado}")
+
+    @app.cli.command("reindexar-busqueda")
+    def reindexar_busqueda_command():
+        """Reconstruye el índice FTS5 de productos."""
+        reindexar_busqueda(get_db())
+        print("Índice de búsqueda reconstruido.")
+
+    @app.cli.command("reconstruir-ventas")
+    def reconstruir_ventas_command():
+        """Recalcula las tablas resumen de ventas desde los pedidos."""
+        procesados = reconstruir_ventas(get_db())
+        print(f"Pedidos procesados: {procesados}")
+
+    @app.cli.command("importar-productos")
+    @click.argument("archivo", type=click.File("rb"))
+    @click.option("--formato", type=click.Choice(["csv", "json", "jsonl"]), help="Por defecto, según la extensión.")
+    def importar_productos_command(archivo, formato):
+        """Importa productos desde un CSV o JSON (crea o actualiza por id)."""
+        db = get_db()
+        reporte = importar_productos(db, leer_archivo(archivo, formato or formato_de(archivo.name)))
+        for error in reporte["errores"]:
+            print(f"Línea {error['linea']}: {error['error']}")
+        if reporte["guardadas"]:
+            get_cache().invalidar(db)
+        print(f"Leídas: {reporte['leidas']}  Guardadas: {reporte['guardadas']}  Con error: {reporte['con_error']}")
+        if reporte["error"]:
+            raise click.ClickException(reporte["error"])
+
+    @app.cli.command("exportar-productos")
+    @click.option("--formato", type=click.Choice(["csv", "json"]), default="csv")
+    @click.option("--salida", type=click.File("w", encoding="utf-8"), default="-", help="Archivo destino (por defecto, stdout).")
+    def exportar_productos_command(formato, salida):
+        """Exporta el catálogo completo sin cargarlo en memoria."""
+        for bloque in exportar_productos(get_db(), formato):
+            salida.write(bloque)
+
+    @app.cli.command("imagenes-derivados")
+    @click.option("--forzar", is_flag=True, help="Regenera también las imágenes ya procesadas.")
+    def imagenes_derivados_command(forzar):
+        """Genera miniaturas y variantes WebP/AVIF de las imágenes existentes."""
+        db = get_db()
+        procesadas = backfill_derivados(db, app.config["UPLOAD_FOLDER"], forzar=forzar)
+        get_cache().invalidar(db)
+        print(f"Imágenes procesadas: {procesadas}")
+
+    @app.cli.group("tareas")
+    def tareas_group():
+        """Cola de tareas en segundo plano."""
+
+    @tareas_group.command("trabajar")
+    @click.option("--hasta-vaciar", is_flag=True, help="Termina cuando no quedan tareas disponibles.")
+    def tareas_trabajar_command(hasta_vaciar):
+        """Procesa tareas en este proceso (para usar con TAREAS_HILOS = 0)."""
+        cola = app.extensions["tareas"]
+        db = get_db()
+        procesadas = 0
+        try:
+            while True:
+                if cola.procesar(db):
+                    procesadas += 1
+                    continue
+                if hasta_vaciar:
+                    break
+                mantenimiento(db, cola.tiempo_maximo, cola.retencion_dias, app.config["ARCHIVOS_GRACIA"])
+                time.sleep(cola.intervalo)
+        except KeyboardInterrupt:
+            pass
+        print(f"Tareas procesadas: {procesadas}")
+
+    @tareas_group.command("estado")
+    def tareas_estado_command():
+        """Muestra cuántas tareas hay en cada estado y sus latencias."""
+        resumen = resumen_tareas(get_db(), recientes=0)
+        for estado, n in resumen["estados"].items():
+            print(f"{estado:<10} {n}")
+        for clave in ("pendiente_mas_antigua_seg", "espera_p50_seg", "espera_p95_seg",
+                      "duracion_p50_seg", "duracion_p95_seg"):
+            valor = resumen[clave]
+            print(f"{clave:<26} {'-' if valor is None else f'{valor:.3f}'}")
+
+# ============================================================
+# 4. INICIALIZACIÓN
+# ============================================================
+# flask --app app run  |  gunicorn "app:create_app()"
 if __name__ == "__main__":
-    with app.app_context():
-        init_db()
-    app.run(debug=True, port=5000)
+    create_app().run(debug=True, port=5000)
@@ -0,0 +1,68 @@
+"""Mide el arranque en frío de un worker: import + create_app() + primera petición.
+
+Cada medición corre en un proceso nuevo, como un worker recién creado por
+gunicorn. Termina con código 1 si la mediana total supera el presupuesto.
+
+    python bench/arranque.py --repeticiones 10 --presupuesto 1.0
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODIGO = """
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+respuesta = app.test_client().get("/")
+t3 = time.perf_counter()
+assert respuesta.status_code == 200, respuesta.status_code
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1,
+                  "primera_peticion": t3 - t2, "total": t3 - t0}))
+"""
+
+def medir(database):
+    entorno = dict(os.environ, PIXSOFT_DATABASE=database)
+    salida = subprocess.run(
+        [sys.executable, "-c", CODIGO], cwd=RAIZ, env=entorno,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--presupuesto", type=float, default=1.0,
+                        help="Máximo aceptable (s) para la mediana del total")
+    parser.add_argument("--database", default=os.path.join(RAIZ, "database.db"),
+                        help="Base a copiar para la medición (no se modifica)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copia = os.path.join(tmp, "database.db")
+        shutil.copy(args.database, copia)
+        medir(copia)  # La primera vez puede aplicar migraciones; no se cuenta
+        mediciones = [medir(copia) for _ in range(args.repeticiones)]
+
+    resumen = {
+        fase: statistics.median(m[fase] for m in mediciones)
+        for fase in ("import", "create_app", "primera_peticion", "total")
+    }
+    for fase, segundos in resumen.items():
+        print(f"{fase:>18}: {segundos * 1000:8.1f} ms")
+    if resumen["total"] > args.presupuesto:
+        print(f"FALLO: el arranque supera el presupuesto de {args.presupuesto:.2f} s")
+        sys.exit(1)
+    print(f"OK: dentro del presupuesto de {args.presupuesto:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""Prueba de carga de la tienda: mezcla de peticiones, latencias y resultado en JSON.
+
+Siembra una base sintética (ver bench/sembrar.py) o usa una existente, y
+lanza peticiones con el cliente de pruebas de Flask o contra un servidor
+WSGI local. Todo corre sin red, en una sola máquina.
+
+    python bench/carga.py --escala pequena --peticiones 2000 --hilos 4
+    python bench/carga.py --db /tmp/bench.db --modo wsgi --comparar bench/resultados/anterior.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from bench.sembrar import PALABRAS_BUSQUEDA, agregar_argumentos, parametros_escala, sembrar, usuario  # noqa: E402
+
+# Peso relativo de cada escenario en la mezcla
+MEZCLA = {"home": 30, "buscar": 30, "categorias": 15, "login": 10, "confirmar_compra": 15}
+CARPETA_RESULTADOS = os.path.join(RAIZ, "bench", "resultados")
+
+# ============================================================
+# CLIENTES
+# ============================================================
+class ClientePruebas:
+    """Cliente de pruebas de Flask (sin sockets)."""
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+
+    def get(self, ruta):
+        return self.cliente.get(ruta).status_code
+
+    def post(self, ruta, form=None, json_=None):
+        respuesta = self.cliente.post(ruta, data=form, json=json_)
+        return respuesta.status_code, respuesta.get_json(silent=True)
+
+class ClienteHTTP:
+    """Cliente HTTP/1.1 con keep-alive y cookie de sesión contra el servidor local."""
+
+    def __init__(self, puerto):
+        self.conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=30)
+        self.cookie = None
+
+    def _pedir(self, metodo, ruta, cuerpo=None, tipo=None):
+        cabeceras = {"Cookie": self.cookie} if self.cookie else {}
+        if tipo:
+            cabeceras["Content-Type"] = tipo
+        self.conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+        respuesta = self.conexion.getresponse()
+        datos = respuesta.read()
+        cookie = respuesta.getheader("Set-Cookie")
+        if cookie:
+            self.cookie = cookie.split(";", 1)[0]
+        return respuesta.status, datos
+
+    def get(self, ruta):
+        return self._pedir("GET", ruta)[0]
+
+    def post(self, ruta, form=None, json_=None):
+        if json_ is not None:
+            estado, datos = self._pedir("POST", ruta, json.dumps(json_), "application/json")
+        else:
+            estado, datos = self._pedir("POST", ruta, urllib.parse.urlencode(form or {}),
+                                        "application/x-www-form-urlencoded")
+        try:
+            return estado, json.loads(datos)
+        except ValueError:
+            return estado, None
+
+def servidor_wsgi(app):
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # Sin una línea de log por petición
+    servidor = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+# ============================================================
+# ESCENARIOS
+# ============================================================
+# Cada escenario recibe (cliente, azar, contexto) y devuelve el código HTTP
+# de la petición medida. La preparación (armar el carrito) no se mide.
+def home(cliente, azar, ctx):
+    return cliente.get("/")
+
+def buscar(cliente, azar, ctx):
+    return cliente.get("/buscar?q=" + urllib.parse.quote(azar.choice(PALABRAS_BUSQUEDA)))
+
+def categorias(cliente, azar, ctx):
+    return cliente.get("/categorias")
+
+def login(cliente, azar, ctx):
+    email, clave = usuario(azar.randrange(ctx["usuarios"]))
+    return cliente.post("/loginuser", form={"username": email, "password": clave})[0]
+
+def confirmar_compra(cliente, azar, ctx):
+    return ctx["confirmar"]()
+
+ESCENARIOS = {"home": home, "buscar": buscar, "categorias": categorias,
+              "login": login, "confirmar_compra": confirmar_compra}
+
+def preparar_compra(cliente, azar, ctx):
+    """Inicia sesión y devuelve una función que arma un carrito y mide solo el checkout."""
+    email, clave = usuario(ctx["id_usuario"])
+    cliente.post("/loginuser", form={"username": email, "password": clave})
+
+    def confirmar():
+        for producto_id in azar.sample(range(1, ctx["productos"] + 1), azar.randint(1, 5)):
+            estado, carrito = cliente.post("/api/carrito/items", json_={"id": producto_id, "cantidad": 1})
+        inicio = time.perf_counter()
+        estado, _ = cliente.post("/confirmar_compra",
+                                 json_={"carrito_id": carrito["id"], "version": carrito["version"]})
+        return estado, time.perf_counter() - inicio
+    return confirmar
+
+# ============================================================
+# EJECUCIÓN
+# ============================================================
+def percentil(valores, p):
+    if not valores:
+        return None
+    indice = min(len(valores) - 1, max(0, round(p / 100 * len(valores) + 0.5) - 1))
+    return valores[indice]
+
+def resumir(latencias, errores, segundos):
+    resumen = {}
+    for nombre, valores in sorted(latencias.items()):
+        valores.sort()
+        resumen[nombre] = {
+            "peticiones": len(valores),
+            "errores": errores.get(nombre, 0),
+            "rps": len(valores) / segundos if segundos else None,
+            "media_ms": 1000 * sum(valores) / len(valores) if valores else None,
+            **{f"p{p}_ms": 1000 * percentil(valores, p) if valores else None for p in (50, 95, 99)},
+        }
+    return resumen
+
+def correr(app, args, ctx):
+    servidor = servidor_wsgi(app) if args.modo == "wsgi" else None
+    nombres = [n for n in MEZCLA if args.mezcla.get(n, 0) > 0]
+    pesos = [args.mezcla[n] for n in nombres]
+    por_hilo = [args.peticiones // args.hilos + (i < args.peticiones % args.hilos) for i in range(args.hilos)]
+    latencias = {n: [] for n in nombres}
+    errores = {}
+    lock = threading.Lock()
+    barrera = threading.Barrier(args.hilos + 1)
+
+    def trabajador(i, cantidad):
+        azar = random.Random(args.semilla * 1000 + i)
+        cliente = ClienteHTTP(servidor.server_port) if servidor else ClientePruebas(app)
+        # Cada hilo compra con su propio usuario para no pisar carritos ajenos
+        ctx_hilo = dict(ctx, id_usuario=i % max(1, ctx["usuarios"]))
+        compra = ClienteHTTP(servidor.server_port) if servidor else ClientePruebas(app)
+        ctx_hilo["confirmar"] = preparar_compra(compra, azar, ctx_hilo)
+        locales, fallas = {n: [] for n in nombres}, {}
+
+        def una(nombre):
+            inicio = time.perf_counter()
+            resultado = ESCENARIOS[nombre](cliente, azar, ctx_hilo)
+            estado, segundos = resultado if isinstance(resultado, tuple) else (resultado, time.perf_counter() - inicio)
+            return estado, segundos
+
+        for _ in range(args.calentamiento // args.hilos):
+            una(azar.choices(nombres, pesos)[0])
+        barrera.wait()
+        for _ in range(cantidad):
+            nombre = azar.choices(nombres, pesos)[0]
+            estado, segundos = una(nombre)
+            locales[nombre].append(segundos)
+            if estado >= 400:
+                fallas[nombre] = fallas.get(nombre, 0) + 1
+        with lock:
+            for nombre, valores in locales.items():
+                latencias[nombre].extend(valores)
+            for nombre, n in fallas.items():
+                errores[nombre] = errores.get(nombre, 0) + n
+
+    hilos = [threading.Thread(target=trabajador, args=(i, n)) for i, n in enumerate(por_hilo)]
+    for hilo in hilos:
+        hilo.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+    if servidor:
+        servidor.shutdown()
+
+    total = sum(len(v) for v in latencias.values())
+    todas = sorted(x for v in latencias.values() for x in v)
+    return {
+        "segundos": segundos,
+        "peticiones": total,
+        "rps": total / segundos if segundos else None,
+        "errores": sum(errores.values()),
+        "p50_ms": 1000 * percentil(todas, 50) if todas else None,
+        "p95_ms": 1000 * percentil(todas, 95) if todas else None,
+        "p99_ms": 1000 * percentil(todas, 99) if todas else None,
+        "escenarios": resumir(latencias, errores, segundos),
+    }
+
+def commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def imprimir(resultado, anterior=None):
+    print(f"{'escenario':<18}{'pet.':>7}{'err.':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          + ("   p95 antes" if anterior else ""))
+    filas = list(resultado["escenarios"].items()) + [("TOTAL", resultado)]
+    for nombre, datos in filas:
+        linea = (f"{nombre:<18}{datos['peticiones']:>7}{datos['errores']:>6}{datos['rps']:>9.1f}"
+                 f"{datos['p50_ms']:>9.2f}{datos['p95_ms']:>9.2f}{datos['p99_ms']:>9.2f}")
+        if anterior:
+            previo = anterior if nombre == "TOTAL" else anterior["escenarios"].get(nombre)
+            if previo and previo.get("p95_ms"):
+                cambio = 100 * (datos["p95_ms"] - previo["p95_ms"]) / previo["p95_ms"]
+                linea += f"   {previo['p95_ms']:>8.2f} ({cambio:+.1f}%)"
+        print(linea)
+
+def leer_mezcla(texto):
+    mezcla = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        if nombre not in ESCENARIOS:
+            raise argparse.ArgumentTypeError(f"Escenario desconocido: {nombre}")
+        mezcla[nombre] = float(peso or 1)
+    return mezcla
+
+def leer_config(texto):
+    clave, _, valor = texto.partition("=")
+    try:
+        return clave, json.loads(valor)
+    except ValueError:
+        return clave, valor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="Base ya sembrada (si no, se siembra una en /tmp según --escala)")
+    agregar_argumentos(parser)
+    parser.add_argument("--modo", choices=["cliente", "wsgi"], default="cliente",
+                        help="cliente: test_client de Flask; wsgi: servidor local con sockets")
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--calentamiento", type=int, default=200, help="Peticiones previas no medidas")
+    parser.add_argument("--hilos", type=int, default=1)
+    parser.add_argument("--mezcla", type=leer_mezcla, default=dict(MEZCLA),
+                        help="Ej.: home=3,buscar=3,confirmar_compra=1")
+    parser.add_argument("--config", type=leer_config, action="append", default=[],
+                        help="Opción de la app, ej.: CACHE_TTL=0 (se puede repetir)")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto en bench/resultados/)")
+    parser.add_argument("--comparar", help="Resultado JSON anterior para comparar p95")
+    args = parser.parse_args()
+
+    escala = parametros_escala(args)
+    ruta = args.db
+    if ruta is None:
+        ruta = f"/tmp/pixsoft-bench-{args.escala}-{args.semilla}.db"
+        sembrar(ruta, semilla=args.semilla, **escala)
+
+    from app import create_app
+    # Toda la carga sale de una IP: los límites por cliente la cortarían
+    config = dict(args.config)
+    config.setdefault("LIMITES_ACTIVOS", False)
+    app = create_app(dict(config, DATABASE=ruta, METRICAS=False))
+    with sqlite3.connect(ruta) as db:
+        ctx = {
+            "productos": db.execute("SELECT MAX(id) FROM productos").fetchone()[0] or 1,
+            "usuarios": db.execute(
+                "SELECT COUNT(*) FROM usuarios WHERE email LIKE '%@bench.local'").fetchone()[0] or 1,
+        }
+
+    resultado = correr(app, args, ctx)
+    resultado.update({
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit_actual(),
+        "parametros": {
+            "modo": args.modo, "hilos": args.hilos, "peticiones": args.peticiones,
+            "calentamiento": args.calentamiento, "mezcla": args.mezcla, "semilla": args.semilla,
+            "config": dict(args.config), "escala": args.escala, **escala,
+        },
+        "entorno": {
+            "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(), "cpus": os.cpu_count(),
+        },
+    })
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+    imprimir(resultado, anterior)
+
+    salida = args.salida or os.path.join(
+        CARPETA_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-{resultado['commit'] or 'sin-git'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"Resultado guardado en {salida}")
+
+if __name__ == "__main__":
+    main()
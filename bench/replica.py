@@ -0,0 +1,214 @@
+"""Lecturas del catálogo bajo carga de escritura, con y sin réplica de lectura.
+
+Procesos aparte escriben sin pausa en la base principal (pedidos con sus
+líneas y cambios de precio, como un pico de checkouts más un admin
+editando) mientras hilos lectores recorren el catálogo con el cliente de
+pruebas de Flask. Se corre dos veces, REPLICA_LECTURA=False y True, sobre
+la misma base; la caché del catálogo se apaga para medir SQLite.
+
+    python bench/replica.py --escala mediana --segundos 20 --lectores 4 --escritores 2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from bench.carga import CARPETA_RESULTADOS, commit_actual, percentil  # noqa: E402
+from bench.sembrar import PALABRAS_BUSQUEDA, agregar_argumentos, parametros_escala, sembrar  # noqa: E402
+
+# ============================================================
+# ESCRITURAS (otro proceso, como otro worker)
+# ============================================================
+def escritor(ruta, semilla, detener, contador, pausa):
+    azar = random.Random(semilla)
+    db = sqlite3.connect(ruta, timeout=30.0, isolation_level=None)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    maximo = db.execute("SELECT MAX(id) FROM productos").fetchone()[0] or 1
+    while not detener.is_set():
+        ids = [azar.randint(1, maximo) for _ in range(azar.randint(1, 5))]
+        db.execute("BEGIN IMMEDIATE")
+        pedido_id = db.execute(
+            "INSERT INTO pedidos (user_email, total, fecha) VALUES (?, 0, datetime('now'))",
+            (f"escritor{semilla}@bench.local",)
+        ).lastrowid
+        db.executemany("""
+            INSERT INTO pedido_items (pedido_id, producto_id, nombre, precio, cantidad, subtotal)
+            SELECT ?, id, nombre, precio, 1, precio FROM productos WHERE id = ?
+        """, [(pedido_id, producto_id) for producto_id in ids])
+        db.execute("UPDATE productos SET precio = round(precio * ?, 2) WHERE id = ?",
+                   (azar.choice((0.99, 1.01)), azar.choice(ids)))
+        db.execute("COMMIT")
+        with contador.get_lock():
+            contador.value += 1
+        if pausa:
+            time.sleep(pausa)
+    db.close()
+
+# ============================================================
+# LECTURAS
+# ============================================================
+def lecturas(app, ctx, args):
+    nombres = ("home", "buscar", "categorias", "api")
+    latencias = {n: [] for n in nombres}
+    errores = [0]
+    lock = threading.Lock()
+    barrera = threading.Barrier(args.lectores + 1)
+    fin = [0.0]
+
+    def lector(i):
+        azar = random.Random(args.semilla * 1000 + i)
+        cliente = app.test_client()
+        rutas = {
+            "home": lambda: f"/?despues={azar.randint(1, ctx['productos'])}",
+            "buscar": lambda: "/buscar?q=" + urllib.parse.quote(azar.choice(PALABRAS_BUSQUEDA)),
+            "categorias": lambda: "/categorias",
+            "api": lambda: f"/api/productos?categoria={azar.choice(ctx['categorias'])}&campos=id,nombre,precio",
+        }
+        locales, fallas = {n: [] for n in nombres}, 0
+        barrera.wait()
+        while time.perf_counter() < fin[0]:
+            nombre = azar.choice(nombres)
+            inicio = time.perf_counter()
+            estado = cliente.get(rutas[nombre]()).status_code
+            locales[nombre].append(time.perf_counter() - inicio)
+            fallas += estado >= 400
+        with lock:
+            for nombre, valores in locales.items():
+                latencias[nombre].extend(valores)
+            errores[0] += fallas
+
+    hilos = [threading.Thread(target=lector, args=(i,)) for i in range(args.lectores)]
+    for hilo in hilos:
+        hilo.start()
+    fin[0] = time.perf_counter() + args.segundos
+    barrera.wait()
+    for hilo in hilos:
+        hilo.join()
+    return latencias, errores[0]
+
+def correr(ruta, ctx, args, replica):
+    from app import create_app
+    app = create_app({
+        "DATABASE": ruta, "METRICAS": False, "LIMITES_ACTIVOS": False, "TAREAS_HILOS": 0,
+        "CACHE_TTL": 0, "REPLICA_LECTURA": replica, "REPLICA_MAX_ANTIGUEDAD": args.max_antiguedad,
+    })
+    if replica:
+        # Primera copia antes de medir, como en un worker que ya está andando
+        app.extensions["replica"].iniciar()
+        while app.extensions["replica"].estadisticas().get("version") is None:
+            time.sleep(0.05)
+
+    detener = multiprocessing.Event()
+    contador = multiprocessing.Value("l", 0)
+    escritores = [
+        multiprocessing.Process(target=escritor, args=(ruta, args.semilla + i, detener, contador, args.pausa))
+        for i in range(args.escritores)
+    ]
+    for proceso in escritores:
+        proceso.start()
+    time.sleep(0.5)  # Que la escritura ya esté en régimen
+    escritas_antes = contador.value
+    inicio = time.perf_counter()
+    latencias, errores = lecturas(app, ctx, args)
+    segundos = time.perf_counter() - inicio
+    escritas = contador.value - escritas_antes
+    detener.set()
+    for proceso in escritores:
+        proceso.join()
+
+    estadisticas_replica = None
+    if replica:
+        estadisticas_replica = app.extensions["replica"].estadisticas()
+        app.extensions["replica"].detener()
+    app.extensions["pool"].cerrar()
+
+    todas = sorted(x for v in latencias.values() for x in v)
+    por_escenario = {}
+    for nombre, valores in latencias.items():
+        valores.sort()
+        por_escenario[nombre] = {
+            "lecturas": len(valores),
+            "p50_ms": 1000 * percentil(valores, 50) if valores else None,
+            "p95_ms": 1000 * percentil(valores, 95) if valores else None,
+        }
+    return {
+        "replica": replica,
+        "segundos": segundos,
+        "lecturas": len(todas),
+        "lecturas_por_seg": len(todas) / segundos,
+        "errores": errores,
+        "escrituras_por_seg": escritas / segundos,
+        **{f"p{p}_ms": 1000 * percentil(todas, p) if todas else None for p in (50, 95, 99)},
+        "escenarios": por_escenario,
+        "estadisticas_replica": estadisticas_replica,
+    }
+
+def imprimir(resultados):
+    print(f"{'modo':<10}{'lect/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'escr/s':>9}{'err.':>6}")
+    for r in resultados:
+        print(f"{'réplica' if r['replica'] else 'principal':<10}{r['lecturas_por_seg']:>9.1f}"
+              f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['escrituras_por_seg']:>9.1f}{r['errores']:>6}")
+    base, replica = resultados
+    print(f"Lecturas/s con réplica: {100 * (replica['lecturas_por_seg'] / base['lecturas_por_seg'] - 1):+.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="Base ya sembrada (se modifica: recibe pedidos y cambios de precio)")
+    agregar_argumentos(parser)
+    parser.add_argument("--segundos", type=float, default=10.0, help="Duración de cada medición")
+    parser.add_argument("--lectores", type=int, default=4)
+    parser.add_argument("--escritores", type=int, default=2, help="Procesos que escriben sin parar")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Segundos entre escrituras de cada escritor")
+    parser.add_argument("--max-antiguedad", type=float, default=5.0, help="REPLICA_MAX_ANTIGUEDAD")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto en bench/resultados/)")
+    args = parser.parse_args()
+
+    escala = parametros_escala(args)
+    ruta = args.db
+    if ruta is None:
+        ruta = f"/tmp/pixsoft-bench-replica-{args.escala}-{args.semilla}.db"
+        sembrar(ruta, semilla=args.semilla, **escala)
+    with sqlite3.connect(ruta) as db:
+        ctx = {
+            "productos": db.execute("SELECT MAX(id) FROM productos").fetchone()[0] or 1,
+            "categorias": [fila[0] for fila in db.execute("SELECT id FROM categorias")] or [1],
+        }
+
+    resultados = [correr(ruta, ctx, args, replica) for replica in (False, True)]
+    imprimir(resultados)
+
+    salida = args.salida or os.path.join(
+        CARPETA_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-replica-{commit_actual() or 'sin-git'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump({
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": commit_actual(),
+            "parametros": {
+                "segundos": args.segundos, "lectores": args.lectores, "escritores": args.escritores,
+                "pausa": args.pausa, "max_antiguedad": args.max_antiguedad, "semilla": args.semilla,
+                "escala": args.escala, **escala,
+            },
+            "entorno": {
+                "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                "plataforma": platform.platform(), "cpus": os.cpu_count(),
+            },
+            "resultados": resultados,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"Resultado guardado en {salida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Crea una base SQLite sintética para los benchmarks.
+
+El esquema sale de las migraciones (create_app) y los datos se generan con
+una semilla fija, así dos corridas con los mismos parámetros producen la
+misma base.
+
+    python bench/sembrar.py /tmp/bench.db --escala mediana
+    python bench/sembrar.py /tmp/bench.db --productos 50000 --usuarios 2000 --lineas 200000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+ESCALAS = {
+    "pequena": {"productos": 1_000, "usuarios": 1_000, "lineas": 10_000},
+    "mediana": {"productos": 100_000, "usuarios": 10_000, "lineas": 100_000},
+    "grande": {"productos": 1_000_000, "usuarios": 10_000, "lineas": 1_000_000},
+}
+LOTE = 10_000
+LINEAS_POR_PEDIDO = (1, 5)
+DIAS_HISTORIA = 365
+
+MARCAS = ["Pixsoft", "Acme", "Nova", "Orion", "Zeta", "Kappa", "Lumen", "Vértice", "Andes", "Austral"]
+TIPOS = ["Impresora", "Control", "Teléfono", "Cable", "Monitor", "Teclado", "Mouse", "Router",
+         "Fuente", "Notebook", "Disco", "Memoria", "Cámara", "Parlante", "Audífonos", "Lector"]
+MODIFICADORES = ["USB", "HDMI", "inalámbrico", "gamer", "pro", "mini", "láser", "4K", "RGB",
+                 "portátil", "térmica", "básico", "plus", "oficina", "hogar"]
+IMAGENES = ["impresoras.png", "controles.png", "iPhone.jpg", "teclado.jpg", "imagen_placeholder.png"]
+PALABRAS_BUSQUEDA = [t.lower() for t in TIPOS] + [m.lower() for m in MODIFICADORES] + ["imp", "tecl", "usb"]
+
+def usuario(i):
+    """Email y contraseña del usuario sintético i (los usa bench/carga.py)."""
+    return f"usuario{i}@bench.local", f"clave{i}"
+
+def _lotes(generador, tamano=LOTE):
+    lote = []
+    for fila in generador:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def sembrar(ruta, productos, usuarios, lineas, semilla=42, log=print):
+    """Crea (o reemplaza) la base en `ruta` y devuelve un resumen con tiempos."""
+    from app import create_app
+    from models.ventas import reconstruir_ventas
+
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    create_app({"DATABASE": ruta, "METRICAS": False}).extensions["pool"].cerrar()
+
+    azar = random.Random(semilla)
+    db = sqlite3.connect(ruta)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = OFF")  # Solo para sembrar; la app usa NORMAL
+    categorias = [fila[0] for fila in db.execute("SELECT id FROM categorias")]
+    tiempos = {}
+
+    inicio = time.perf_counter()
+    filas = (
+        (f"{azar.choice(TIPOS)} {azar.choice(MARCAS)} {azar.choice(MODIFICADORES)} {i}",
+         round(azar.uniform(5, 1500), 2), azar.choice(IMAGENES), azar.choice(categorias))
+        for i in range(productos)
+    )
+    for lote in _lotes(filas):
+        with db:
+            db.executemany("INSERT INTO productos (nombre, precio, img, categoria_id) VALUES (?, ?, ?, ?)", lote)
+    tiempos["productos"] = time.perf_counter() - inicio
+    log(f"Productos: {productos} ({tiempos['productos']:.1f} s)")
+
+    inicio = time.perf_counter()
+    filas = ((f"Usuario {i}", *usuario(i)) for i in range(usuarios))
+    for lote in _lotes(filas):
+        with db:
+            db.executemany("INSERT OR IGNORE INTO usuarios (nombre, email, password) VALUES (?, ?, ?)", lote)
+    tiempos["usuarios"] = time.perf_counter() - inicio
+    log(f"Usuarios: {usuarios} ({tiempos['usuarios']:.1f} s)")
+
+    inicio = time.perf_counter()
+    precios = dict(db.execute("SELECT id, precio FROM productos").fetchall())
+    ids = list(precios)
+    nombres = {}
+    hoy = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+    def pedidos_y_lineas():
+        pedido_id, restantes = 0, lineas
+        while restantes > 0:
+            pedido_id += 1
+            n = min(restantes, azar.randint(*LINEAS_POR_PEDIDO))
+            restantes -= n
+            fecha = hoy - timedelta(seconds=azar.randint(0, DIAS_HISTORIA * 86400))
+            email = usuario(azar.randrange(usuarios))[0] if usuarios else "anonimo@bench.local"
+            items = []
+            for producto_id in azar.sample(ids, min(n, len(ids))):
+                cantidad = azar.randint(1, 3)
+                items.append((pedido_id, producto_id, precios[producto_id], cantidad))
+            yield (pedido_id, email, fecha.isoformat(" ")), items
+
+    if ids:
+        for lote in _lotes(pedidos_y_lineas(), LOTE // 3):
+            cabeceras, detalle = [], []
+            for (pedido_id, email, fecha), items in lote:
+                cabeceras.append((pedido_id, email, sum(p * c for _, _, p, c in items), fecha))
+                detalle.extend(items)
+            faltan = {pid for _, pid, _, _ in detalle if pid not in nombres}
+            for i in range(0, len(faltan), 500):
+                trozo = list(faltan)[i:i + 500]
+                nombres.update(db.execute(
+                    f"SELECT id, nombre FROM productos WHERE id IN ({','.join('?' * len(trozo))})", trozo
+                ).fetchall())
+            with db:
+                db.executemany("INSERT INTO pedidos (id, user_email, total, fecha) VALUES (?, ?, ?, ?)", cabeceras)
+                db.executemany(
+                    "INSERT INTO pedido_items (pedido_id, producto_id, nombre, precio, cantidad, subtotal) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(pid, prod, nombres[prod], precio, cant, precio * cant) for pid, prod, precio, cant in detalle]
+                )
+        reconstruir_ventas(db)
+    tiempos["pedidos"] = time.perf_counter() - inicio
+    log(f"Líneas de pedido: {lineas} ({tiempos['pedidos']:.1f} s)")
+
+    db.execute("PRAGMA optimize")
+    db.close()
+    return {"ruta": ruta, "productos": productos, "usuarios": usuarios, "lineas": lineas,
+            "semilla": semilla, "tiempos": tiempos}
+
+def parametros_escala(args):
+    valores = dict(ESCALAS[args.escala])
+    for campo in ("productos", "usuarios", "lineas"):
+        if getattr(args, campo) is not None:
+            valores[campo] = getattr(args, campo)
+    return valores
+
+def agregar_argumentos(parser):
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="pequena")
+    parser.add_argument("--productos", type=int, help="Reemplaza el valor de la escala")
+    parser.add_argument("--usuarios", type=int, help="Reemplaza el valor de la escala")
+    parser.add_argument("--lineas", type=int, help="Líneas de pedido; reemplaza el valor de la escala")
+    parser.add_argument("--semilla", type=int, default=42)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("ruta", help="Archivo de la base a crear (se reemplaza si existe)")
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+    sembrar(args.ruta, semilla=args.semilla, **parametros_escala(args))
+
+if __name__ == "__main__":
+    main()
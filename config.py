@@ -0,0 +1,60 @@
+import os
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+class Config:
+    SECRET_KEY = "supersecreto123"  # Cambia en producción
+    DATABASE = os.environ.get("PIXSOFT_DATABASE", os.path.join(BASE_DIR, "database.db"))
+    UPLOAD_FOLDER = os.path.join(BASE_DIR, "static/imagenes")
+    MEDIA_FOLDER = UPLOAD_FOLDER  # Videos servidos por /media/
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
+    IMAGEN_MAX_BYTES = 8 * 1024 * 1024  # Por imagen subida
+    IMAGEN_MAX_LADO = 6000              # Píxeles, leídos de la cabecera sin decodificar
+    ARCHIVOS_GRACIA = 3600              # Segundos antes de borrar una subida sin referencias
+    IMPORTACION_MAX_BYTES = 256 * 1024 * 1024  # Importación masiva de productos
+    PAGE_SIZE = 24       # Productos por página en el catálogo
+    MAX_PAGE_SIZE = 100
+    CATEGORIA_MAX_PRODUCTOS = 12  # Productos por categoría en /categorias
+    DB_POOL_SIZE = 8              # Conexiones SQLite por proceso
+    CACHE_TTL = 60                # Segundos que vive una entrada de la caché
+    CACHE_MAX_ENTRADAS = 512
+    MIGRACIONES_FOLDER = os.path.join(BASE_DIR, "migraciones")
+    METRICAS = True               # Tiempos por endpoint y por consulta en /metrics
+    METRICAS_TOKEN = None         # Si se define, /metrics exige "Authorization: Bearer <token>"
+    METRICAS_CABECERA = False     # Agrega X-Debug-SQL y Server-Timing a cada respuesta
+    SQL_LENTA_MS = None           # Umbral (ms) para registrar consultas lentas; None = apagado
+    TAREAS_HILOS = 2              # Hilos de la cola de tareas por proceso; 0 = solo `flask tareas trabajar`
+    TAREAS_INTENTOS = 3
+    TAREAS_ESPERA_REINTENTO = 5   # Segundos antes del primer reintento; se duplica en cada uno
+    TAREAS_TIEMPO_MAXIMO = 300    # Segundos en curso tras los que una tarea se da por colgada
+    TAREAS_RETENCION_DIAS = 7     # Tareas terminadas que se conservan para el admin
+    # Réplica: el catálogo se lee de una copia en memoria de la base, por proceso.
+    # Un cambio del catálogo hecho desde la app (sube cache_version) llega a la
+    # copia en hasta REPLICA_MAX_ANTIGUEDAD / 2 s; otros commits (pedidos, SQL
+    # directo sobre productos) en hasta REPLICA_REFRESCO_MAXIMO s. Sin commits
+    # no se copia. Si el hilo de refresco no revisa la copia en
+    # REPLICA_MAX_ANTIGUEDAD s, se lee la base principal.
+    REPLICA_LECTURA = False
+    REPLICA_MAX_ANTIGUEDAD = 5    # Segundos
+    REPLICA_REFRESCO_MAXIMO = 60  # Segundos, como CACHE_TTL
+    MIGRAR_AL_ARRANCAR = True     # False: solo avisa; se migra con `flask db upgrade`
+    # Límites por tipo de petición: `capacidad` peticiones seguidas, que se
+    # recuperan a `por_minuto`; cuentan por IP y, con sesión, también por usuario
+    LIMITES_ACTIVOS = True
+    LIMITES_BACKEND = "memoria"   # "sqlite" para compartir los contadores entre workers
+    LIMITES_DATABASE = None       # Por defecto <DATABASE>-limites.db (solo backend sqlite)
+    # Cubetas por lo que hace la petición: "buscar" cubre toda búsqueda FTS
+    # (?q= en /, /buscar, /categorias y /api/productos) con un solo presupuesto
+    LIMITES = {
+        "login": {"endpoints": ("auth.loginuser",), "capacidad": 5, "por_minuto": 5, "metodos": ("POST",)},
+        "registro": {"endpoints": ("auth.register_user",), "capacidad": 3, "por_minuto": 2, "metodos": ("POST",)},
+        "buscar": {"endpoints": ("public.index", "public.buscar", "public.categorias", "api.productos"),
+                   "parametro": "q", "capacidad": 30, "por_minuto": 60},
+        "sugerencias": {"endpoints": ("public.sugerencias",), "capacidad": 60, "por_minuto": 300},
+        "compra": {"endpoints": ("carrito.confirmar_compra",), "capacidad": 5, "por_minuto": 10},
+    }
+    # Peticiones simultáneas por proceso entre todos estos endpoints (503 al pasarse)
+    CONCURRENCIA_ENDPOINTS = ("public.index", "public.buscar", "api.productos", "carrito.confirmar_compra")
+    CONCURRENCIA_MAXIMA = 16
+    # Blueprints que registra create_app(); se importan solo al crear la app
+    BLUEPRINTS = ("routers.public", "routers.auth", "routers.carrito", "routers.admin", "routers.api")
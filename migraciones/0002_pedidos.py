@@ -0,0 +1,76 @@
+"""Pedidos con cabecera y líneas.
+
+Versiones antiguas de /confirmar_compra creaban al vuelo una tabla pedidos
+plana (una fila por producto comprado). Si existe, se renombra y sus filas
+se copian por lotes: las filas con el mismo user_email y fecha forman un
+pedido. Si la migración se corta, vuelve a correr desde donde quedó.
+"""
+from models.migraciones import en_lotes
+
+TABLAS = """
+CREATE TABLE IF NOT EXISTS pedidos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_email TEXT NOT NULL,
+    total REAL NOT NULL,
+    fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS pedido_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pedido_id INTEGER NOT NULL,
+    producto_id INTEGER,
+    nombre TEXT NOT NULL,
+    precio REAL NOT NULL,
+    cantidad INTEGER NOT NULL,
+    subtotal REAL NOT NULL,
+    FOREIGN KEY (pedido_id) REFERENCES pedidos(id)
+);
+"""
+
+def columnas(db, tabla):
+    return {fila[1] for fila in db.execute(f"PRAGMA table_info({tabla})")}
+
+def upgrade(db):
+    with db:
+        if "producto_id" in columnas(db, "pedidos"):
+            db.execute("ALTER TABLE pedidos RENAME TO pedidos_legado")
+            # Los índices viajan con la tabla renombrada; se liberan sus nombres
+            db.execute("DROP INDEX IF EXISTS idx_pedidos_user_email")
+            db.execute("DROP INDEX IF EXISTS idx_pedidos_fecha")
+        for sentencia in TABLAS.split(";"):
+            if sentencia.strip():
+                db.execute(sentencia)
+
+    if not columnas(db, "pedidos_legado"):
+        return
+
+    def copiar(db, filas):
+        for id_, email, producto_id, nombre, precio, cantidad, subtotal, fecha in filas:
+            pedido = db.execute(
+                "SELECT id FROM pedidos WHERE user_email=? AND fecha IS ? ORDER BY id DESC LIMIT 1",
+                (email or "", fecha)
+            ).fetchone()
+            if pedido is None:
+                pedido_id = db.execute(
+                    "INSERT INTO pedidos (user_email, total, fecha) VALUES (?, 0, ?)",
+                    (email or "", fecha)
+                ).lastrowid
+            else:
+                pedido_id = pedido[0]
+            precio, cantidad = precio or 0, cantidad or 0
+            subtotal = subtotal if subtotal is not None else precio * cantidad
+            db.execute(
+                "INSERT INTO pedido_items (pedido_id, producto_id, nombre, precio, cantidad, subtotal) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (pedido_id, producto_id, nombre or "", precio, cantidad, subtotal)
+            )
+            db.execute("UPDATE pedidos SET total = total + ? WHERE id=?", (subtotal, pedido_id))
+        # Las filas copiadas se borran en la misma transacción: así se reanuda sin duplicar
+        db.executemany("DELETE FROM pedidos_legado WHERE id=?", [(f[0],) for f in filas])
+
+    en_lotes(db, """
+        SELECT id, user_email, producto_id, nombre, precio, cantidad, subtotal, fecha
+        FROM pedidos_legado WHERE id > ? ORDER BY id LIMIT ?
+    """, copiar)
+    with db:
+        db.execute("DROP TABLE pedidos_legado")
@@ -0,0 +1,15 @@
+-- ============================================================
+-- ÍNDICES
+-- ============================================================
+-- Listados por categoría (/categorias, filtro ?categoria=) ordenados por id
+CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos (categoria_id, id);
+
+-- Historial de pedidos por usuario y reportes por fecha
+CREATE INDEX IF NOT EXISTS idx_pedidos_user_email ON pedidos (user_email, fecha);
+CREATE INDEX IF NOT EXISTS idx_pedidos_fecha ON pedidos (fecha);
+
+CREATE INDEX IF NOT EXISTS idx_pedido_items_pedido ON pedido_items (pedido_id);
+CREATE INDEX IF NOT EXISTS idx_pedido_items_producto ON pedido_items (producto_id);
+
+-- usuarios.email ya tiene índice: la restricción UNIQUE crea
+-- sqlite_autoindex_usuarios_1, que es el que usa el login.
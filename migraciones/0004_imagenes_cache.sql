@@ -0,0 +1,19 @@
+-- ============================================================
+-- DERIVADOS DE IMÁGENES
+-- ============================================================
+-- nombre: archivo original en static/imagenes (productos.img)
+-- variantes: JSON con las versiones reducidas por formato y ancho
+CREATE TABLE IF NOT EXISTS imagenes (
+    nombre TEXT PRIMARY KEY,
+    variantes TEXT NOT NULL
+);
+
+-- ============================================================
+-- VERSIÓN DEL CATÁLOGO (invalidación de cachés entre procesos)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS cache_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO cache_version (id, version) VALUES (1, 0);
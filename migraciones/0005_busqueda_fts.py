@@ -0,0 +1,60 @@
+"""Índice de búsqueda FTS5 sobre productos.
+
+Primero se crean la tabla y los triggers (los productos nuevos ya se indexan
+solos) y después se indexan los existentes en lotes cortos.
+"""
+from models.migraciones import en_lotes
+
+# remove_diacritics permite que "electronica" encuentre "Electrónica"
+ESQUEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+    nombre,
+    categoria,
+    tokenize = "unicode61 remove_diacritics 2"
+);
+
+CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+    INSERT INTO productos_fts (rowid, nombre, categoria)
+    VALUES (new.id, new.nombre,
+            COALESCE((SELECT nombre FROM categorias WHERE id = new.categoria_id), ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+    DELETE FROM productos_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE OF id, nombre, categoria_id ON productos BEGIN
+    DELETE FROM productos_fts WHERE rowid = old.id;
+    INSERT INTO productos_fts (rowid, nombre, categoria)
+    VALUES (new.id, new.nombre,
+            COALESCE((SELECT nombre FROM categorias WHERE id = new.categoria_id), ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS categorias_fts_au AFTER UPDATE OF nombre ON categorias BEGIN
+    UPDATE productos_fts SET categoria = new.nombre
+    WHERE rowid IN (SELECT id FROM productos WHERE categoria_id = new.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS categorias_fts_ad AFTER DELETE ON categorias BEGIN
+    UPDATE productos_fts SET categoria = ''
+    WHERE rowid IN (SELECT id FROM productos WHERE categoria_id = old.id);
+END;
+"""
+
+def upgrade(db):
+    db.executescript(f"BEGIN IMMEDIATE;\n{ESQUEMA}\nCOMMIT;")
+
+    def indexar(db, filas):
+        db.executemany(
+            "INSERT INTO productos_fts (rowid, nombre, categoria) VALUES (?, ?, ?)",
+            [tuple(f) for f in filas]
+        )
+
+    # Solo los productos que aún no están en el índice
+    en_lotes(db, """
+        SELECT p.id, p.nombre, COALESCE(c.nombre, '')
+        FROM productos p
+        LEFT JOIN categorias c ON p.categoria_id = c.id
+        WHERE p.id > ? AND NOT EXISTS (SELECT 1 FROM productos_fts f WHERE f.rowid = p.id)
+        ORDER BY p.id LIMIT ?
+    """, indexar)
@@ -0,0 +1,24 @@
+-- ============================================================
+-- CARRITOS EN EL SERVIDOR
+-- ============================================================
+-- Un carrito por usuario; version aumenta con cada cambio para que el
+-- checkout confirme exactamente el contenido que el cliente mostró (los
+-- cambios de precio y los productos borrados la suben desde 0010).
+CREATE TABLE IF NOT EXISTS carritos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_email TEXT UNIQUE NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    actualizado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Solo ids y cantidades: nombre y precio se leen siempre de productos
+CREATE TABLE IF NOT EXISTS carrito_items (
+    carrito_id INTEGER NOT NULL,
+    producto_id INTEGER NOT NULL,
+    cantidad INTEGER NOT NULL CHECK (cantidad > 0),
+    PRIMARY KEY (carrito_id, producto_id),
+    FOREIGN KEY (carrito_id) REFERENCES carritos(id) ON DELETE CASCADE,
+    FOREIGN KEY (producto_id) REFERENCES productos(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_carrito_items_producto ON carrito_items (producto_id);
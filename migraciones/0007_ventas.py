@@ -0,0 +1,35 @@
+"""Tablas resumen de ventas por día, producto y categoría.
+
+Se llenan con los pedidos existentes, en lotes (ver models/ventas.py).
+"""
+from models.ventas import reconstruir_ventas
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ventas_dia (
+    dia TEXT PRIMARY KEY,
+    pedidos INTEGER NOT NULL,
+    unidades INTEGER NOT NULL,
+    ingresos REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ventas_producto_dia (
+    dia TEXT NOT NULL,
+    producto_id INTEGER NOT NULL,
+    nombre TEXT NOT NULL,
+    unidades INTEGER NOT NULL,
+    ingresos REAL NOT NULL,
+    PRIMARY KEY (dia, producto_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ventas_categoria_dia (
+    dia TEXT NOT NULL,
+    categoria_id INTEGER NOT NULL,
+    unidades INTEGER NOT NULL,
+    ingresos REAL NOT NULL,
+    PRIMARY KEY (dia, categoria_id)
+) WITHOUT ROWID;
+"""
+
+def upgrade(db):
+    db.executescript(f"BEGIN IMMEDIATE;\n{ESQUEMA}\nCOMMIT;")
+    reconstruir_ventas(db)
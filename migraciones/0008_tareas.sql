@@ -0,0 +1,24 @@
+-- ============================================================
+-- COLA DE TAREAS EN SEGUNDO PLANO
+-- ============================================================
+-- Trabajo lento que las rutas del admin dejan para después (derivados de
+-- imágenes, etc.). Los tiempos son segundos epoch (REAL) para poder
+-- calcular la espera y la duración de cada tarea con una resta.
+CREATE TABLE IF NOT EXISTS tareas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL,
+    datos TEXT NOT NULL DEFAULT '{}',   -- JSON con los argumentos
+    estado TEXT NOT NULL DEFAULT 'pendiente'
+        CHECK (estado IN ('pendiente', 'en_curso', 'hecha', 'fallida')),
+    intentos INTEGER NOT NULL DEFAULT 0,
+    max_intentos INTEGER NOT NULL DEFAULT 3,
+    error TEXT,                         -- Último error
+    creada REAL NOT NULL,
+    disponible REAL NOT NULL,           -- No se toma antes (espera entre reintentos)
+    iniciada REAL,
+    terminada REAL
+);
+
+-- Solo las pendientes: es lo que recorre cada worker al buscar trabajo
+CREATE INDEX IF NOT EXISTS idx_tareas_pendientes ON tareas (disponible, id) WHERE estado = 'pendiente';
+CREATE INDEX IF NOT EXISTS idx_tareas_estado ON tareas (estado, terminada);
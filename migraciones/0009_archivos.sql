@@ -0,0 +1,37 @@
+-- ============================================================
+-- ARCHIVOS SUBIDOS (almacenamiento por contenido)
+-- ============================================================
+-- Cada imagen subida se guarda una sola vez como
+-- static/imagenes/subidas/<hh>/<sha256>.<ext>; productos.img guarda esa
+-- ruta. referencias la mantienen los triggers de productos, y el barrido
+-- de la cola de tareas borra los archivos que quedan en cero.
+CREATE TABLE IF NOT EXISTS archivos (
+    hash TEXT PRIMARY KEY,                 -- sha256 del contenido (hex)
+    ruta TEXT NOT NULL UNIQUE,             -- Relativa a UPLOAD_FOLDER
+    bytes INTEGER NOT NULL,
+    tipo TEXT NOT NULL,                    -- png, jpg, gif, webp, avif
+    ancho INTEGER,
+    alto INTEGER,
+    referencias INTEGER NOT NULL DEFAULT 0,
+    creado REAL NOT NULL                   -- epoch; se renueva con cada subida repetida
+);
+
+CREATE INDEX IF NOT EXISTS idx_archivos_huerfanos ON archivos (creado) WHERE referencias <= 0;
+
+-- Las rutas que no son de archivos (imágenes fijas en static/imagenes)
+-- no coinciden con ninguna fila y los UPDATE no hacen nada
+CREATE TRIGGER IF NOT EXISTS productos_archivos_ai AFTER INSERT ON productos
+WHEN NEW.img IS NOT NULL BEGIN
+    UPDATE archivos SET referencias = referencias + 1 WHERE ruta = NEW.img;
+END;
+
+CREATE TRIGGER IF NOT EXISTS productos_archivos_ad AFTER DELETE ON productos
+WHEN OLD.img IS NOT NULL BEGIN
+    UPDATE archivos SET referencias = referencias - 1 WHERE ruta = OLD.img;
+END;
+
+CREATE TRIGGER IF NOT EXISTS productos_archivos_au AFTER UPDATE OF img ON productos
+WHEN OLD.img IS NOT NEW.img BEGIN
+    UPDATE archivos SET referencias = referencias - 1 WHERE ruta = OLD.img;
+    UPDATE archivos SET referencias = referencias + 1 WHERE ruta = NEW.img;
+END;
@@ -0,0 +1,18 @@
+-- ============================================================
+-- VERSIÓN DEL CARRITO ANTE CAMBIOS DE PRODUCTOS
+-- ============================================================
+-- El total del carrito sale de productos.precio y sus líneas desaparecen
+-- con ON DELETE CASCADE: ambos cambian lo que el cliente ve sin pasar por
+-- cambiar_item(), así que aquí también sube la versión de los carritos
+-- afectados y confirmar_carrito() responde 409 en vez de cobrar otro total.
+CREATE TRIGGER IF NOT EXISTS productos_carritos_precio AFTER UPDATE OF precio ON productos
+WHEN OLD.precio IS NOT NEW.precio BEGIN
+    UPDATE carritos SET version = version + 1, actualizado = CURRENT_TIMESTAMP
+    WHERE id IN (SELECT carrito_id FROM carrito_items WHERE producto_id = NEW.id);
+END;
+
+-- BEFORE: después del DELETE la cascada ya borró las líneas
+CREATE TRIGGER IF NOT EXISTS productos_carritos_borrado BEFORE DELETE ON productos BEGIN
+    UPDATE carritos SET version = version + 1, actualizado = CURRENT_TIMESTAMP
+    WHERE id IN (SELECT carrito_id FROM carrito_items WHERE producto_id = OLD.id);
+END;
@@ -0,0 +1,106 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ============================================================
+# CACHÉ DE LECTURAS DEL CATÁLOGO
+# ============================================================
+class CacheCatalogo:
+    """Caché en memoria (TTL + LRU) para consultas del catálogo.
+
+    Las entradas se invalidan todas juntas subiendo la generación cuando un
+    admin modifica productos. La versión guardada en la tabla cache_version
+    permite que otros procesos (workers de gunicorn) se enteren del cambio:
+    cada proceso la consulta como mucho una vez cada `intervalo_version`.
+    """
+
+    def __init__(self, maximo=256, ttl=60.0, intervalo_version=1.0):
+        self.maximo = maximo
+        self.ttl = ttl
+        self.intervalo_version = intervalo_version
+        self._datos = OrderedDict()  # clave -> (expira, valor)
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._version = None
+        self._ultima_verificacion = 0.0
+        self._stats = {"hits": 0, "misses": 0, "expulsiones": 0, "invalidaciones": 0}
+
+    def obtener(self, db, clave, calcular):
+        valor, generacion = self.buscar(db, clave)
+        if valor is None:
+            valor = calcular()
+            self.guardar(clave, valor, generacion)
+        return valor
+
+    def buscar(self, db, clave):
+        """Devuelve (valor o None, generación) para usar luego en guardar()."""
+        if db is not None:
+            self._sincronizar(db)
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[0] > ahora:
+                self._datos.move_to_end(clave)
+                self._stats["hits"] += 1
+                return entrada[1], self._generacion
+            self._stats["misses"] += 1
+            return None, self._generacion
+
+    def guardar(self, clave, valor, generacion):
+        with self._lock:
+            # Si hubo una invalidación mientras se calculaba, no guardar
+            if generacion != self._generacion:
+                return
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+                self._stats["expulsiones"] += 1
+
+    @property
+    def version(self):
+        return self._version or 0
+
+    def version_actual(self, db):
+        """Versión del catálogo, releída de la base como máximo una vez por intervalo."""
+        self._sincronizar(db)
+        return self.version
+
+    def invalidar(self, db=None):
+        """Vacía la caché; con `db` también avisa a los demás procesos."""
+        if db is not None:
+            db.execute("UPDATE cache_version SET version = version + 1 WHERE id = 1")
+            db.commit()
+            fila = db.execute("SELECT version FROM cache_version WHERE id = 1").fetchone()
+        with self._lock:
+            if db is not None and fila is not None:
+                self._version = fila[0]
+            self._vaciar()
+
+    def _sincronizar(self, db):
+        ahora = time.monotonic()
+        if ahora - self._ultima_verificacion < self.intervalo_version:
+            return
+        self._ultima_verificacion = ahora
+        try:
+            fila = db.execute("SELECT version FROM cache_version WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            return
+        version = fila[0] if fila else 0
+        with self._lock:
+            # La versión solo crece: una réplica de lectura puede traer una anterior
+            if self._version is None or version > self._version:
+                if self._version is not None:
+                    self._vaciar()
+                self._version = version
+
+    def _vaciar(self):
+        self._datos.clear()
+        self._generacion += 1
+        self._stats["invalidaciones"] += 1
+
+    def estadisticas(self):
+        with self._lock:
+            return dict(self._stats, entradas=len(self._datos),
+                        generacion=self._generacion, version=self._version)
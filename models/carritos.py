@@ -0,0 +1,142 @@
+from models.catalogo import MAX_ID
+from models.pedidos import CarritoInvalido, MAX_CANTIDAD, MAX_ITEMS_CARRITO, es_entero, precios_productos
+from models.ventas import acumular_ventas
+
+# ============================================================
+# CARRITOS EN EL SERVIDOR
+# ============================================================
+# La página envía cambios pequeños (un producto por petición) y el checkout
+# solo confirma el carrito por id y versión, sin reenviar su contenido.
+
+ITEMS_SQL = """
+    SELECT p.id, p.nombre, p.precio, p.img, ci.cantidad, p.precio * ci.cantidad AS subtotal
+    FROM carrito_items ci
+    JOIN productos p ON p.id = ci.producto_id
+    WHERE ci.carrito_id = ?
+"""
+
+class CarritoDesactualizado(CarritoInvalido):
+    """El carrito cambió desde que el cliente lo leyó (versión distinta)."""
+
+def obtener_carrito(db, user_email):
+    """Devuelve (id, version) del carrito del usuario, creándolo si no existe."""
+    fila = db.execute("SELECT id, version FROM carritos WHERE user_email=?", (user_email,)).fetchone()
+    if fila is None:
+        with db:
+            db.execute("INSERT OR IGNORE INTO carritos (user_email) VALUES (?)", (user_email,))
+        fila = db.execute("SELECT id, version FROM carritos WHERE user_email=?", (user_email,)).fetchone()
+    return fila["id"], fila["version"]
+
+def resumen_carrito(db, carrito_id):
+    fila = db.execute(f"""
+        SELECT c.version, COALESCE(SUM(i.subtotal), 0) AS total, COALESCE(SUM(i.cantidad), 0) AS unidades
+        FROM carritos c LEFT JOIN ({ITEMS_SQL}) i ON 1
+        WHERE c.id = ?
+    """, (carrito_id, carrito_id)).fetchone()
+    return {"id": carrito_id, "version": fila["version"], "total": fila["total"], "unidades": fila["unidades"]}
+
+def contenido_carrito(db, carrito_id):
+    items = [dict(fila) for fila in db.execute(ITEMS_SQL + " ORDER BY p.id", (carrito_id,))]
+    resumen = resumen_carrito(db, carrito_id)
+    resumen["items"] = items
+    return resumen
+
+def validar_id(valor, mensaje):
+    # Solo enteros JSON: int() truncaría 1.9 y aceptaría true como 1
+    if not es_entero(valor) or not 0 < valor <= MAX_ID:
+        raise CarritoInvalido(mensaje)
+    return valor
+
+def validar_cantidad(valor, minimo=0):
+    if not es_entero(valor) or not minimo <= valor <= MAX_CANTIDAD:
+        raise CarritoInvalido("Cantidad inválida")
+    return valor
+
+def cambiar_item(db, carrito_id, producto_id, cantidad, sumar=False):
+    """Fija (o suma a) la cantidad de un producto; con 0 lo quita.
+
+    El producto se valida aquí, al agregarlo, y no recién en el checkout.
+    Devuelve el resumen del carrito con la línea modificada.
+    """
+    if cantidad and producto_id not in precios_productos(db, [producto_id]):
+        raise CarritoInvalido(f"Producto no disponible: {producto_id}")
+    with db:
+        if sumar:
+            db.execute("""
+                INSERT INTO carrito_items (carrito_id, producto_id, cantidad) VALUES (?, ?, ?)
+                ON CONFLICT (carrito_id, producto_id)
+                DO UPDATE SET cantidad = MIN(cantidad + excluded.cantidad, ?)
+            """, (carrito_id, producto_id, cantidad, MAX_CANTIDAD))
+        elif cantidad:
+            db.execute("""
+                INSERT INTO carrito_items (carrito_id, producto_id, cantidad) VALUES (?, ?, ?)
+                ON CONFLICT (carrito_id, producto_id) DO UPDATE SET cantidad = excluded.cantidad
+            """, (carrito_id, producto_id, cantidad))
+        else:
+            db.execute("DELETE FROM carrito_items WHERE carrito_id=? AND producto_id=?",
+                       (carrito_id, producto_id))
+        if db.execute("SELECT COUNT(*) FROM carrito_items WHERE carrito_id=?",
+                      (carrito_id,)).fetchone()[0] > MAX_ITEMS_CARRITO:
+            raise CarritoInvalido("El carrito tiene demasiados productos")
+        db.execute("UPDATE carritos SET version = version + 1, actualizado = CURRENT_TIMESTAMP WHERE id=?",
+                   (carrito_id,))
+    resumen = resumen_carrito(db, carrito_id)
+    item = db.execute(ITEMS_SQL + " AND ci.producto_id = ?", (carrito_id, producto_id)).fetchone()
+    resumen["item"] = dict(item) if item else {"id": producto_id, "cantidad": 0}
+    return resumen
+
+def fusionar_carrito(db, carrito_id, cantidades):
+    """Mezcla el carrito del navegador ({producto_id: cantidad}) con el del servidor.
+
+    Se queda con la mayor de las dos cantidades, así repetir la fusión
+    (otra pestaña, un reintento) no duplica productos.
+    """
+    existentes = precios_productos(db, cantidades)
+    filas = [(carrito_id, pid, min(cantidad, MAX_CANTIDAD))
+             for pid, cantidad in cantidades.items() if pid in existentes]
+    with db:
+        db.executemany("""
+            INSERT INTO carrito_items (carrito_id, producto_id, cantidad) VALUES (?, ?, ?)
+            ON CONFLICT (carrito_id, producto_id) DO UPDATE SET cantidad = MAX(cantidad, excluded.cantidad)
+        """, filas)
+        if db.execute("SELECT COUNT(*) FROM carrito_items WHERE carrito_id=?",
+                      (carrito_id,)).fetchone()[0] > MAX_ITEMS_CARRITO:
+            raise CarritoInvalido("El carrito tiene demasiados productos")
+        db.execute("UPDATE carritos SET version = version + 1, actualizado = CURRENT_TIMESTAMP WHERE id=?",
+                   (carrito_id,))
+    return contenido_carrito(db, carrito_id)
+
+def confirmar_carrito(db, carrito_id, user_email, version=None):
+    """Convierte el carrito en un pedido y lo vacía, en una sola transacción.
+
+    Con version, falla si el carrito cambió desde que el cliente lo leyó.
+    Devuelve (pedido_id, total).
+    """
+    with db:
+        # El UPDATE toma el bloqueo de escritura antes de leer las líneas
+        cursor = db.execute(
+            "UPDATE carritos SET version = version + 1, actualizado = CURRENT_TIMESTAMP "
+            "WHERE id=? AND user_email=? AND (? IS NULL OR version=?)",
+            (carrito_id, user_email, version, version)
+        )
+        if cursor.rowcount == 0:
+            if db.execute("SELECT 1 FROM carritos WHERE id=? AND user_email=?",
+                          (carrito_id, user_email)).fetchone():
+                raise CarritoDesactualizado("El carrito cambió; revisa su contenido")
+            raise CarritoInvalido("Carrito no encontrado")
+
+        total = db.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(subtotal), 0) FROM ({ITEMS_SQL})", (carrito_id,)
+        ).fetchone()
+        if not total[0]:
+            raise CarritoInvalido("Carrito vacío")
+        pedido_id = db.execute(
+            "INSERT INTO pedidos (user_email, total) VALUES (?, ?)", (user_email, total[1])
+        ).lastrowid
+        db.execute(f"""
+            INSERT INTO pedido_items (pedido_id, producto_id, nombre, precio, cantidad, subtotal)
+            SELECT ?, id, nombre, precio, cantidad, subtotal FROM ({ITEMS_SQL})
+        """, (pedido_id, carrito_id))
+        db.execute("DELETE FROM carrito_items WHERE carrito_id=?", (carrito_id,))
+        acumular_ventas(db, pedido_id)
+    return pedido_id, total[1]
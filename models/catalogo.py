@@ -0,0 +1,264 @@
+import re
+from collections import namedtuple
+from itertools import groupby
+from operator import itemgetter
+
+# ============================================================
+# CONSULTAS DEL CATÁLOGO (paginación por cursor / keyset)
+# ============================================================
+PRODUCTOS_SQL = """
+    SELECT p.*, c.nombre AS categoria_nombre, i.variantes AS img_variantes
+    FROM productos p
+    LEFT JOIN categorias c ON p.categoria_id = c.id
+    LEFT JOIN imagenes i ON i.nombre = p.img
+"""
+
+# Búsqueda sobre el índice FTS5; bm25 pondera más el nombre que la categoría
+# (valores más negativos = más relevantes)
+BUSQUEDA_SQL = """
+    SELECT p.*, c.nombre AS categoria_nombre, i.variantes AS img_variantes,
+           bm25(productos_fts, 2.0, 1.0) AS rango
+    FROM productos_fts
+    JOIN productos p ON p.id = productos_fts.rowid
+    LEFT JOIN categorias c ON p.categoria_id = c.id
+    LEFT JOIN imagenes i ON i.nombre = p.img
+    WHERE productos_fts MATCH ?
+"""
+
+# Categorías con sus N productos más recientes en una sola consulta.
+# La subconsulta correlacionada usa el índice (categoria_id, id), así que
+# cada categoría cuesta una búsqueda en el índice y no un recorrido completo.
+CATEGORIAS_SQL = """
+    SELECT c.id AS cat_id, c.nombre AS cat_nombre,
+           (SELECT COUNT(*) FROM productos WHERE categoria_id = c.id) AS cat_total,
+           p.*, i.variantes AS img_variantes
+    FROM categorias c
+    LEFT JOIN productos p ON p.id IN (
+        SELECT id FROM productos WHERE categoria_id = c.id ORDER BY id DESC LIMIT ?
+    )
+    LEFT JOIN imagenes i ON i.nombre = p.img
+"""
+
+MAX_ID = 2 ** 63 - 1  # Mayor INTEGER de SQLite; uno más grande da OverflowError al enlazarlo
+
+# productos: filas de la página actual
+# siguiente / anterior: cursores para las páginas vecinas, o None
+Pagina = namedtuple("Pagina", "productos siguiente anterior")
+
+def parametros_paginacion(args, por_defecto=24, maximo=100):
+    despues = args.get("despues") or None
+    antes = args.get("antes") or None
+    limite = args.get("limite", default=por_defecto, type=int)
+    limite = max(1, min(limite, maximo))
+    return despues, antes, limite
+
+def pagina_catalogo(db, cache, args, config, q=""):
+    """Página de productos según los parámetros de la petición, vía caché."""
+    despues, antes, limite = parametros_paginacion(
+        args, config["PAGE_SIZE"], config["MAX_PAGE_SIZE"]
+    )
+    categoria_id = args.get("categoria", type=_id_categoria)
+    return cache.obtener(
+        db, ("productos", q, despues, antes, limite, categoria_id),
+        lambda: listar_productos(db, q, despues, antes, limite, categoria_id)
+    )
+
+def listar_productos(db, q="", despues=None, antes=None, limite=24, categoria_id=None):
+    """Devuelve una página de productos.
+
+    En lugar de OFFSET se usa la última fila vista como cursor, así el coste
+    de cada página no depende de cuántas filas haya antes que ella. Sin
+    búsqueda el orden es por id descendente; con búsqueda, por relevancia.
+    """
+    if q:
+        return buscar_productos(db, q, despues, antes, limite, categoria_id)
+
+    despues, antes = _cursor_id(despues), _cursor_id(antes)
+    hacia_atras = antes is not None
+    condiciones, params = [], []
+    if categoria_id is not None:
+        condiciones.append("p.categoria_id = ?")
+        params.append(categoria_id)
+    if hacia_atras:
+        condiciones.append("p.id > ?")
+        params.append(antes)
+    elif despues is not None:
+        condiciones.append("p.id < ?")
+        params.append(despues)
+
+    sql = PRODUCTOS_SQL
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    sql += " ORDER BY p.id {}".format("ASC" if hacia_atras else "DESC")
+    # Se pide una fila extra para saber si existe otra página
+    sql += " LIMIT ?"
+    params.append(limite + 1)
+
+    filas = db.execute(sql, params).fetchall()
+    return _paginar(filas, limite, hacia_atras, despues is not None,
+                    lambda fila: str(fila["id"]))
+
+def buscar_productos(db, q, despues=None, antes=None, limite=24, categoria_id=None):
+    consulta = consulta_fts(q)
+    if not consulta:
+        return Pagina([], None, None)
+
+    despues, antes = _cursor_rango(despues), _cursor_rango(antes)
+    hacia_atras = antes is not None
+    sql, params = BUSQUEDA_SQL, [consulta]
+    if categoria_id is not None:
+        sql += " AND p.categoria_id = ?"
+        params.append(categoria_id)
+    if hacia_atras:
+        sql += " AND (rango < ? OR (rango = ? AND p.id > ?)) ORDER BY rango DESC, p.id ASC"
+        params += [antes[0], antes[0], antes[1]]
+    elif despues is not None:
+        sql += " AND (rango > ? OR (rango = ? AND p.id < ?)) ORDER BY rango ASC, p.id DESC"
+        params += [despues[0], despues[0], despues[1]]
+    else:
+        sql += " ORDER BY rango ASC, p.id DESC"
+    sql += " LIMIT ?"
+    params.append(limite + 1)
+
+    filas = db.execute(sql, params).fetchall()
+    return _paginar(filas, limite, hacia_atras, despues is not None,
+                    lambda fila: "{!r}:{}".format(fila["rango"], fila["id"]))
+
+def listar_categorias(db):
+    return db.execute("SELECT id, nombre FROM categorias ORDER BY nombre").fetchall()
+
+def productos_por_categoria(db, limite=12, q=""):
+    """Agrupa los productos por categoría con una única consulta.
+
+    Devuelve (categorias, productos_por_categoria): la lista de categorías
+    (id, nombre, total) y un dict nombre -> últimos `limite` productos.
+    """
+    sql, params = CATEGORIAS_SQL, [limite]
+    if q:
+        sql += " WHERE c.nombre LIKE ?"
+        params.append(f"%{q}%")
+    sql += " ORDER BY c.nombre, c.id, p.id DESC"
+
+    categorias, agrupados = [], {}
+    filas = db.execute(sql, params)
+    for (cat_id, nombre, total), grupo in groupby(
+        filas, key=lambda fila: (fila["cat_id"], fila["cat_nombre"], fila["cat_total"])
+    ):
+        categorias.append({"id": cat_id, "nombre": nombre, "total": total})
+        agrupados[nombre] = [fila for fila in grupo if fila["id"] is not None]
+    return categorias, agrupados
+
+def consulta_fts(texto):
+    # Cada palabra se busca como prefijo ("impre" encuentra "Impresora");
+    # las comillas evitan que la sintaxis de FTS5 del usuario se interprete
+    terminos = re.findall(r"\w+", texto)
+    return " ".join('"{}"*'.format(termino) for termino in terminos)
+
+def reindexar_busqueda(db):
+    db.execute("DELETE FROM productos_fts")
+    db.execute("""
+        INSERT INTO productos_fts (rowid, nombre, categoria)
+        SELECT p.id, p.nombre, COALESCE(c.nombre, '')
+        FROM productos p
+        LEFT JOIN categorias c ON p.categoria_id = c.id
+    """)
+    db.commit()
+
+def _paginar(filas, limite, hacia_atras, con_cursor, cursor_de):
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    if hacia_atras:
+        filas.reverse()
+        siguiente = cursor_de(filas[-1]) if filas else None
+        anterior = cursor_de(filas[0]) if hay_mas else None
+    else:
+        siguiente = cursor_de(filas[-1]) if hay_mas else None
+        anterior = cursor_de(filas[0]) if con_cursor and filas else None
+    return Pagina(filas, siguiente, anterior)
+
+def _id_categoria(valor):
+    # Un id fuera del rango de SQLite no existe: se acota para que la página salga vacía
+    return max(-MAX_ID, min(int(valor), MAX_ID))
+
+def _en_rango(valor):
+    return -MAX_ID <= valor <= MAX_ID
+
+def _cursor_id(cursor):
+    # Un cursor mal formado o fuera de rango equivale a la primera página
+    try:
+        id = int(cursor) if cursor is not None else None
+    except ValueError:
+        return None
+    return id if id is None or _en_rango(id) else None
+
+def _cursor_rango(cursor):
+    try:
+        rango, _, id = cursor.rpartition(":")
+        rango, id = float(rango), int(id)
+    except (AttributeError, ValueError):
+        return None
+    return (rango, id) if _en_rango(id) else None
+
+def pagina_a_dict(pagina):
+    return {
+        "productos": [dict(fila) for fila in pagina.productos],
+        "siguiente": pagina.siguiente,
+        "anterior": pagina.anterior,
+    }
+
+def quiere_json(request):
+    if request.args.get("formato") == "json":
+        return True
+    return request.accept_mimetypes.best == "application/json"
+
+# ============================================================
+# API JSON DEL CATÁLOGO
+# ============================================================
+# Campo público -> columna de PRODUCTOS_SQL. Las filas se convierten en
+# tuplas solo con los campos pedidos, sin pasar por un dict por fila.
+CAMPOS_API = {
+    "id": "id",
+    "nombre": "nombre",
+    "precio": "precio",
+    "img": "img",
+    "categoria_id": "categoria_id",
+    "categoria": "categoria_nombre",
+}
+
+class CampoInvalido(ValueError):
+    pass
+
+def campos_api(texto):
+    """Lista de campos de `?campos=id,nombre,precio`; todos si viene vacío."""
+    if not texto:
+        return list(CAMPOS_API)
+    campos = []
+    for campo in texto.split(","):
+        campo = campo.strip()
+        if campo not in CAMPOS_API:
+            raise CampoInvalido(f"Campo desconocido: {campo}")
+        if campo not in campos:
+            campos.append(campo)
+    return campos
+
+def filas_a_tuplas(filas, campos):
+    if not filas:
+        return []
+    columnas = filas[0].keys()
+    indices = [columnas.index(CAMPOS_API[campo]) for campo in campos]
+    if len(indices) == 1:
+        i = indices[0]
+        return [(fila[i],) for fila in filas]
+    tomar = itemgetter(*indices)
+    return [tomar(fila) for fila in filas]
+
+def obtener_producto(db, producto_id):
+    return db.execute(PRODUCTOS_SQL + " WHERE p.id = ?", (producto_id,)).fetchone()
+
+def categorias_con_total(db):
+    return db.execute("""
+        SELECT c.id, c.nombre,
+               (SELECT COUNT(*) FROM productos WHERE categoria_id = c.id) AS total
+        FROM categorias c
+        ORDER BY c.nombre
+    """).fetchall()
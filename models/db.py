@@ -1,24 +1,95 @@
-import sqlite3
-from flask import g
-from config import Config
+from flask import g, current_app
+from models.pool import PoolConexiones
+from models.cache import CacheCatalogo
+from models.instrumentacion import ConexionMedida
+from models.sugerencias import IndiceSugerencias
+from models.tareas import ColaTareas
+from models.replica import ReplicaLectura
+from models.migraciones import migrar, version_actual, ultima_version
+
+def get_pool():
+    return current_app.extensions["pool"]
+
+def get_cache():
+    return current_app.extensions["cache_catalogo"]
+
+def get_sugerencias():
+    return current_app.extensions["sugerencias"]
+
+def get_tareas():
+    return current_app.extensions["tareas"]
 
 def get_db():
     db = getattr(g, "_database", None)
     if db is None:
-        db = g._database = sqlite3.connect(Config.DATABASE)
-        db.row_factory = sqlite3.Row
+        db = get_pool().obtener()
+        if "metricas" in current_app.extensions:
+            lenta = current_app.config["SQL_LENTA_MS"]
+            db = ConexionMedida(db, None if lenta is None else lenta / 1000)
+        g._database = db
     return db
 
+def get_db_lectura():
+    """Conexión para leer el catálogo: la réplica en memoria si está activa y al día.
+
+    Si no hay réplica, o su copia supera REPLICA_MAX_ANTIGUEDAD, es get_db().
+    Nunca se debe escribir con ella.
+    """
+    replica = current_app.extensions.get("replica")
+    if replica is None:
+        return get_db()
+    lectura = getattr(g, "_lectura", None)
+    if lectura is None:
+        lectura = replica.obtener()
+        if lectura is None:
+            return get_db()
+        g._lectura = lectura
+    return lectura[1]
+
 def close_db(e=None):
-    db = getattr(g, "_database", None)
+    db = g.pop("_database", None)
     if db is not None:
-        db.close()
+        get_pool().devolver(getattr(db, "conexion", db))
+    lectura = g.pop("_lectura", None)
+    if lectura is not None:
+        current_app.extensions["replica"].devolver(*lectura)
+
+def init_app(app):
+    app.extensions["pool"] = PoolConexiones(app.config["DATABASE"], tamano=app.config["DB_POOL_SIZE"])
+    app.extensions["cache_catalogo"] = CacheCatalogo(
+        app.config["CACHE_MAX_ENTRADAS"], app.config["CACHE_TTL"]
+    )
+    app.extensions["sugerencias"] = IndiceSugerencias()
+    app.extensions["tareas"] = cola = ColaTareas(
+        app, hilos=app.config["TAREAS_HILOS"],
+        espera_reintento=app.config["TAREAS_ESPERA_REINTENTO"],
+        tiempo_maximo=app.config["TAREAS_TIEMPO_MAXIMO"],
+        retencion_dias=app.config["TAREAS_RETENCION_DIAS"],
+    )
+    # Los hilos arrancan con la primera petición de cada proceso
+    app.before_request(cola.iniciar)
+    if app.config["REPLICA_LECTURA"]:
+        app.extensions["replica"] = replica = ReplicaLectura(
+            app.config["DATABASE"], app.config["REPLICA_MAX_ANTIGUEDAD"],
+            al_cambiar_version=app.extensions["cache_catalogo"].invalidar,
+            refresco_maximo=app.config["REPLICA_REFRESCO_MAXIMO"],
+        )
+        app.before_request(replica.iniciar)
+    app.teardown_appcontext(close_db)
 
 def init_db(app):
+    """Aplica las migraciones pendientes.
+
+    En un arranque normal solo se compara la versión de schema_version con la
+    última migración disponible; en producción conviene MIGRAR_AL_ARRANCAR=False
+    y correr `flask db upgrade` en el despliegue.
+    """
     db = get_db()
-    try:
-        with app.open_resource("schema.sql", mode="r", encoding="utf-8") as f:
-            db.executescript(f.read())
-        db.commit()
-    except FileNotFoundError:
-        print("No se encontró 'schema.sql'. Base de datos no inicializada.")
+    actual = version_actual(db)
+    ultima = ultima_version(app.config["MIGRACIONES_FOLDER"])
+    if actual >= ultima:
+        return []
+    if not app.config["MIGRAR_AL_ARRANCAR"]:
+        app.logger.warning("Base de datos en la versión %s de %s: ejecuta 'flask db upgrade'", actual, ultima)
+        return []
+    return migrar(db, app.config["MIGRACIONES_FOLDER"])
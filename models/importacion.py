@@ -0,0 +1,249 @@
+import csv
+import io
+import json
+import math
+import sqlite3
+import unicodedata
+from models.catalogo import MAX_ID
+
+# ============================================================
+# IMPORTACIÓN / EXPORTACIÓN MASIVA DE PRODUCTOS
+# ============================================================
+# Los archivos se leen fila a fila (CSV, JSON en arreglo o JSON Lines) y se
+# guardan en lotes: una transacción y un executemany por lote. Las filas
+# inválidas no detienen la importación; se informan con su número de línea.
+# Si la base rechaza un lote, se reintenta fila a fila para saber cuáles.
+LOTE_IMPORTACION = 500
+LOTE_EXPORTACION = 1000
+MAX_ERRORES = 1000       # Errores detallados en el reporte (el conteo es total)
+BLOQUE_JSON = 64 * 1024  # Caracteres leídos por vez del JSON
+CAMPOS = ("id", "nombre", "precio", "img", "categoria")
+
+class ImportacionInvalida(ValueError):
+    pass
+
+def _texto(flujo):
+    # utf-8-sig descarta el BOM que agrega Excel al guardar CSV
+    if isinstance(flujo, io.TextIOBase):
+        return flujo
+    return io.TextIOWrapper(flujo, encoding="utf-8-sig", newline="")
+
+def leer_csv(flujo):
+    """Genera (linea, fila) desde un CSV con encabezado."""
+    lector = csv.DictReader(_texto(flujo))
+    if not lector.fieldnames or "nombre" not in lector.fieldnames:
+        raise ImportacionInvalida("El CSV debe tener encabezado con al menos 'nombre'")
+    for fila in lector:
+        yield lector.line_num, fila
+
+def leer_json(flujo, bloque=BLOQUE_JSON):
+    """Genera (n, objeto) desde un arreglo JSON o JSON Lines sin cargarlo entero."""
+    texto = _texto(flujo)
+    decodificador = json.JSONDecoder()
+    buffer, pos, n, agotado = "", 0, 0, False
+    while True:
+        # Separadores entre objetos: espacios, comas y los corchetes del arreglo
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,[]":
+            pos += 1
+        if pos < len(buffer):
+            try:
+                objeto, pos = decodificador.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if agotado:
+                    raise ImportacionInvalida(f"JSON mal formado después del objeto {n}") from None
+            else:
+                n += 1
+                yield n, objeto
+                continue
+        elif agotado:
+            return
+        # Objeto incompleto o buffer vacío: leer más y descartar lo ya procesado
+        leido = texto.read(bloque)
+        agotado = not leido
+        buffer, pos = buffer[pos:] + leido, 0
+
+def leer_archivo(flujo, formato):
+    if formato == "csv":
+        return leer_csv(flujo)
+    if formato in ("json", "jsonl"):
+        return leer_json(flujo)
+    raise ImportacionInvalida(f"Formato no soportado: {formato}")
+
+def formato_de(nombre_archivo, por_defecto="csv"):
+    extension = nombre_archivo.rsplit(".", 1)[-1].lower() if "." in nombre_archivo else ""
+    return extension if extension in ("csv", "json", "jsonl") else por_defecto
+
+def _clave(nombre):
+    sin_tildes = unicodedata.normalize("NFKD", nombre).encode("ascii", "ignore").decode("ascii")
+    return sin_tildes.strip().casefold()
+
+def mapa_categorias(db):
+    """{id: id} y {nombre normalizado: id} para resolver la columna categoria."""
+    mapa = {}
+    for fila in db.execute("SELECT id, nombre FROM categorias"):
+        mapa[str(fila["id"])] = fila["id"]
+        mapa[_clave(fila["nombre"])] = fila["id"]
+    return mapa
+
+def validar_fila(fila, categorias):
+    """Devuelve (id, nombre, precio, img, categoria_id) o lanza ValueError."""
+    if not isinstance(fila, dict):
+        raise ValueError("La fila no es un objeto")
+    nombre = str(fila.get("nombre") or "").strip()
+    if not nombre:
+        raise ValueError("Falta el nombre")
+    try:
+        precio = float(str(fila.get("precio", "")).strip())
+    except ValueError:
+        raise ValueError("El precio debe ser un número válido") from None
+    if not math.isfinite(precio) or precio < 0:
+        raise ValueError("El precio debe ser un número válido")
+
+    producto_id = str(fila.get("id") or "").strip()
+    if producto_id:
+        if not producto_id.isdecimal():
+            raise ValueError("El id debe ser un entero")
+        producto_id = int(producto_id)
+        if not 0 < producto_id <= MAX_ID:
+            raise ValueError("El id está fuera de rango")
+    else:
+        producto_id = None
+
+    categoria = fila.get("categoria", fila.get("categoria_id"))
+    categoria_id = None
+    if categoria not in (None, ""):
+        categoria_id = categorias.get(_clave(str(categoria)))
+        if categoria_id is None:
+            raise ValueError(f"Categoría desconocida: {categoria}")
+
+    img = str(fila.get("img") or "").strip() or None
+    return producto_id, nombre, precio, img, categoria_id
+
+GUARDAR_CON_ID_SQL = """
+    INSERT INTO productos (id, nombre, precio, img, categoria_id) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        nombre = excluded.nombre,
+        precio = excluded.precio,
+        img = COALESCE(excluded.img, img),
+        categoria_id = excluded.categoria_id
+"""
+GUARDAR_SIN_ID_SQL = "INSERT INTO productos (nombre, precio, img, categoria_id) VALUES (?, ?, ?, ?)"
+
+def _guardar_lote(db, con_id, sin_id):
+    """Guarda las filas (linea, valores); devuelve [(linea, error)] de las rechazadas."""
+    try:
+        with db:
+            if con_id:
+                db.executemany(GUARDAR_CON_ID_SQL, [valores for _, valores in con_id])
+            if sin_id:
+                db.executemany(GUARDAR_SIN_ID_SQL, [valores for _, valores in sin_id])
+        return []
+    except (sqlite3.IntegrityError, OverflowError):
+        pass
+    # El lote se deshizo: fila a fila en una transacción, donde una sentencia
+    # que falla se deshace sola y las demás siguen
+    errores = []
+    with db:
+        for sql, filas in ((GUARDAR_CON_ID_SQL, con_id), (GUARDAR_SIN_ID_SQL, sin_id)):
+            for linea, valores in filas:
+                try:
+                    db.execute(sql, valores)
+                except (sqlite3.IntegrityError, OverflowError) as e:
+                    errores.append((linea, str(e)))
+    return errores
+
+def importar_productos(db, filas, lote=LOTE_IMPORTACION):
+    """Valida y guarda las filas (linea, dict) en transacciones de `lote` filas.
+
+    Las filas con id actualizan el producto existente (o lo crean con ese id);
+    las demás se insertan como productos nuevos. Si el archivo está mal
+    formado se guarda lo leído hasta ahí y reporte["error"] lo indica.
+    """
+    categorias = mapa_categorias(db)
+    reporte = {"leidas": 0, "guardadas": 0, "con_error": 0, "errores": [], "error": None}
+    con_id, sin_id = [], []
+
+    def anotar_error(linea, error):
+        reporte["con_error"] += 1
+        if len(reporte["errores"]) < MAX_ERRORES:
+            reporte["errores"].append({"linea": linea, "error": error})
+
+    def vaciar():
+        rechazadas = sorted(_guardar_lote(db, con_id, sin_id))
+        reporte["guardadas"] += len(con_id) + len(sin_id) - len(rechazadas)
+        for linea, error in rechazadas:
+            anotar_error(linea, error)
+        con_id.clear()
+        sin_id.clear()
+
+    try:
+        for linea, fila in filas:
+            reporte["leidas"] += 1
+            try:
+                producto_id, *datos = validar_fila(fila, categorias)
+            except ValueError as e:
+                anotar_error(linea, str(e))
+                continue
+            if producto_id is None:
+                sin_id.append((linea, tuple(datos)))
+            else:
+                con_id.append((linea, (producto_id, *datos)))
+            if len(con_id) + len(sin_id) >= lote:
+                vaciar()
+    except ImportacionInvalida as e:
+        reporte["error"] = str(e)
+    except (csv.Error, UnicodeDecodeError) as e:
+        reporte["error"] = f"Archivo ilegible: {e}"
+    # Lo validado antes de un error de formato también se guarda
+    if con_id or sin_id:
+        vaciar()
+    return reporte
+
+# ------------------------------------------------------------
+# Exportación
+# ------------------------------------------------------------
+EXPORTAR_SQL = """
+    SELECT p.id, p.nombre, p.precio, p.img, c.nombre AS categoria
+    FROM productos p
+    LEFT JOIN categorias c ON p.categoria_id = c.id
+    WHERE p.id > ?
+    ORDER BY p.id
+    LIMIT ?
+"""
+
+def _lotes_productos(db, lote):
+    # Keyset por id: cada lote es una consulta corta, sin cursores abiertos entre yields
+    ultimo = 0
+    while True:
+        filas = db.execute(EXPORTAR_SQL, (ultimo, lote)).fetchall()
+        if not filas:
+            return
+        yield filas
+        ultimo = filas[-1]["id"]
+
+def exportar_csv(db, lote=LOTE_EXPORTACION):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(CAMPOS)
+    for filas in _lotes_productos(db, lote):
+        escritor.writerows(tuple(fila) for fila in filas)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def exportar_json(db, lote=LOTE_EXPORTACION):
+    separador = "[\n"
+    for filas in _lotes_productos(db, lote):
+        yield separador + ",\n".join(
+            json.dumps(dict(zip(CAMPOS, fila)), ensure_ascii=False) for fila in filas
+        )
+        separador = ",\n"
+    yield "[]\n" if separador == "[\n" else "\n]\n"
+
+def exportar_productos(db, formato):
+    if formato == "csv":
+        return exportar_csv(db)
+    if formato == "json":
+        return exportar_json(db)
+    raise ImportacionInvalida(f"Formato no soportado: {formato}")
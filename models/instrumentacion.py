@@ -0,0 +1,91 @@
+import logging
+import time
+
+# ============================================================
+# CONEXIÓN INSTRUMENTADA
+# ============================================================
+# get_db() entrega la conexión del pool envuelta en ConexionMedida cuando
+# las métricas están activas. Cada consulta suma tiempo, filas y cantidad a
+# los contadores de la petición; el resto de la API de sqlite3 pasa directo.
+logger = logging.getLogger("pixsoft.sql")
+
+class CursorMedido:
+    __slots__ = ("_cursor", "_medida")
+
+    def __init__(self, cursor, medida):
+        self._cursor = cursor
+        self._medida = medida
+
+    def _fetch(self, metodo, *args):
+        inicio = time.perf_counter()
+        resultado = metodo(*args)
+        filas = len(resultado) if isinstance(resultado, list) else int(resultado is not None)
+        self._medida.sumar(time.perf_counter() - inicio, filas)
+        return resultado
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(self._cursor.fetchmany, size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def __iter__(self):
+        # Se lee todo de una vez para medir el tiempo de SQLite y no el del
+        # código que recorre las filas (las consultas iteradas son lotes cortos)
+        return iter(self.fetchall())
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+class ConexionMedida:
+    """Envuelve una sqlite3.Connection y mide las consultas de una petición."""
+
+    def __init__(self, conexion, lenta=None):
+        self.conexion = conexion
+        self.lenta = lenta  # Segundos; None desactiva el log de consultas lentas
+        self.consultas = 0
+        self.tiempo = 0.0
+        self.filas = 0
+        self.lentas = 0
+        self._sql = None
+        self._inicio_sql = 0.0
+
+    def sumar(self, segundos, filas=0):
+        self.tiempo += segundos
+        self.filas += filas
+        if self.lenta is not None and self._sql is not None:
+            # El tiempo de una consulta incluye ejecutar y leer sus filas
+            total = time.perf_counter() - self._inicio_sql
+            if total >= self.lenta:
+                self.lentas += 1
+                logger.warning("Consulta lenta (%.1f ms): %s", total * 1000, " ".join(self._sql.split()))
+                self._sql = None
+
+    def _medir(self, metodo, sql, *args):
+        self.consultas += 1
+        self._sql, self._inicio_sql = sql, time.perf_counter()
+        resultado = metodo(sql, *args)
+        self.sumar(time.perf_counter() - self._inicio_sql)
+        return CursorMedido(resultado, self)
+
+    def execute(self, sql, parametros=()):
+        return self._medir(self.conexion.execute, sql, parametros)
+
+    def executemany(self, sql, filas):
+        return self._medir(self.conexion.executemany, sql, filas)
+
+    def executescript(self, script):
+        return self._medir(self.conexion.executescript, script)
+
+    def __enter__(self):
+        self.conexion.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.conexion.__exit__(*exc)
+
+    def __getattr__(self, nombre):
+        return getattr(self.conexion, nombre)
@@ -0,0 +1,116 @@
+import importlib.util
+import os
+import re
+import sqlite3
+from collections import namedtuple
+
+# ============================================================
+# MIGRACIONES DEL ESQUEMA
+# ============================================================
+# Cada archivo de migraciones/ se llama NNNN_nombre.sql o NNNN_nombre.py y
+# se aplica una sola vez, en orden. Las .py definen upgrade(db).
+# La tabla schema_version registra las que ya se aplicaron.
+CARPETA_MIGRACIONES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migraciones"
+)
+PATRON = re.compile(r"^(\d+)_(\w+)\.(sql|py)$")
+LOTE = 500  # Filas por transacción en los backfills
+
+Migracion = namedtuple("Migracion", "version nombre ruta")
+
+def descubrir(carpeta=CARPETA_MIGRACIONES):
+    migraciones = []
+    for archivo in os.listdir(carpeta):
+        m = PATRON.match(archivo)
+        if m:
+            migraciones.append(Migracion(int(m.group(1)), m.group(2), os.path.join(carpeta, archivo)))
+    migraciones.sort()
+    for anterior, siguiente in zip(migraciones, migraciones[1:]):
+        if anterior.version == siguiente.version:
+            raise ValueError(f"Migraciones con la misma versión: {anterior.ruta}, {siguiente.ruta}")
+    return migraciones
+
+def ultima_version(carpeta=CARPETA_MIGRACIONES):
+    migraciones = descubrir(carpeta)
+    return migraciones[-1].version if migraciones else 0
+
+def version_actual(db):
+    try:
+        return db.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0  # Base nueva o anterior a las migraciones
+
+def aplicadas(db):
+    try:
+        return db.execute(
+            "SELECT version, nombre, aplicada FROM schema_version ORDER BY version"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+def migrar(db, carpeta=CARPETA_MIGRACIONES, hasta=None):
+    """Aplica en orden las migraciones pendientes y devuelve las aplicadas."""
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db.commit()
+
+    hechas = []
+    for migracion in descubrir(carpeta):
+        if hasta is not None and migracion.version > hasta:
+            break
+        # Se relee en cada paso: otro proceso pudo aplicarla mientras tanto
+        if migracion.version <= version_actual(db):
+            continue
+        aplicar(db, migracion)
+        hechas.append(migracion)
+    return hechas
+
+def aplicar(db, migracion):
+    if migracion.ruta.endswith(".sql"):
+        with open(migracion.ruta, encoding="utf-8") as f:
+            sql = f.read()
+        # Todo el archivo y su registro en una transacción: se aplica completo o nada
+        # (nombre solo tiene caracteres \w, ver PATRON)
+        try:
+            db.executescript(
+                f"BEGIN IMMEDIATE;\n{sql}\n;"
+                f"INSERT OR IGNORE INTO schema_version (version, nombre) "
+                f"VALUES ({migracion.version}, '{migracion.nombre}');\nCOMMIT;"
+            )
+        except sqlite3.Error:
+            if db.in_transaction:
+                db.rollback()
+            raise
+    else:
+        spec = importlib.util.spec_from_file_location(f"migracion_{migracion.version}", migracion.ruta)
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        # Las migraciones .py pueden confirmar por lotes; deben poder reanudarse
+        modulo.upgrade(db)
+        with db:
+            db.execute(
+                "INSERT OR IGNORE INTO schema_version (version, nombre) VALUES (?, ?)",
+                (migracion.version, migracion.nombre)
+            )
+
+def en_lotes(db, seleccionar, procesar, lote=LOTE):
+    """Recorre una tabla por id en transacciones cortas.
+
+    seleccionar: SQL con parámetros (ultimo_id, limite) que devuelve filas
+    ordenadas por id en su primera columna. procesar(db, filas) escribe el
+    lote. Entre lotes se libera el bloqueo para no frenar al catálogo.
+    """
+    ultimo_id, total = 0, 0
+    while True:
+        filas = db.execute(seleccionar, (ultimo_id, lote)).fetchall()
+        if not filas:
+            return total
+        with db:
+            procesar(db, filas)
+        ultimo_id = filas[-1][0]
+        total += len(filas)
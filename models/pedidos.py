@@ -0,0 +1,84 @@
+from models.catalogo import MAX_ID
+from models.ventas import acumular_ventas
+
+# ============================================================
+# PEDIDOS (checkout)
+# ============================================================
+MAX_ITEMS_CARRITO = 500
+MAX_CANTIDAD = 999
+LOTE_IN = 500  # Máximo de parámetros por consulta IN (...)
+
+class CarritoInvalido(ValueError):
+    pass
+
+def cantidades_carrito(items):
+    """Normaliza el carrito enviado por el cliente a {producto_id: cantidad}.
+
+    Del cliente solo se aceptan ids y cantidades; nombre y precio se leen
+    siempre de la tabla productos.
+    """
+    if not isinstance(items, list) or not items:
+        raise CarritoInvalido("Carrito vacío")
+    if len(items) > MAX_ITEMS_CARRITO:
+        raise CarritoInvalido("El carrito tiene demasiados productos")
+
+    cantidades = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise CarritoInvalido("Producto inválido en el carrito")
+        producto_id = item.get("id")
+        cantidad = item.get("quantity", 1)
+        # Solo enteros JSON: int() truncaría 1.5 y aceptaría true como 1
+        if not es_entero(producto_id) or not 0 < producto_id <= MAX_ID:
+            raise CarritoInvalido("Producto inválido en el carrito")
+        if not es_entero(cantidad) or not 0 < cantidad <= MAX_CANTIDAD:
+            raise CarritoInvalido("Cantidad inválida en el carrito")
+        cantidades[producto_id] = min(cantidades.get(producto_id, 0) + cantidad, MAX_CANTIDAD)
+    return cantidades
+
+def es_entero(valor):
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+def precios_productos(db, ids):
+    productos = {}
+    ids = list(ids)
+    for i in range(0, len(ids), LOTE_IN):
+        lote = ids[i:i + LOTE_IN]
+        marcadores = ",".join("?" * len(lote))
+        for fila in db.execute(
+            f"SELECT id, nombre, precio FROM productos WHERE id IN ({marcadores})", lote
+        ):
+            productos[fila["id"]] = fila
+    return productos
+
+def crear_pedido(db, user_email, cantidades):
+    """Registra cabecera y líneas del pedido en una sola transacción.
+
+    Devuelve (pedido_id, total).
+    """
+    productos = precios_productos(db, cantidades)
+    faltantes = [pid for pid in cantidades if pid not in productos]
+    if faltantes:
+        raise CarritoInvalido("Productos no disponibles: {}".format(
+            ", ".join(str(pid) for pid in faltantes)))
+
+    lineas = []
+    for producto_id, cantidad in cantidades.items():
+        producto = productos[producto_id]
+        subtotal = producto["precio"] * cantidad
+        lineas.append((producto_id, producto["nombre"], producto["precio"], cantidad, subtotal))
+    total = sum(linea[4] for linea in lineas)
+
+    # Los precios se leen antes de abrir la transacción para que el
+    # bloqueo de escritura dure solo lo que tardan los INSERT
+    with db:
+        pedido_id = db.execute(
+            "INSERT INTO pedidos (user_email, total) VALUES (?, ?)", (user_email, total)
+        ).lastrowid
+        db.executemany(
+            "INSERT INTO pedido_items (pedido_id, producto_id, nombre, precio, cantidad, subtotal) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(pedido_id,) + linea for linea in lineas]
+        )
+        acumular_ventas(db, pedido_id)
+    return pedido_id, total
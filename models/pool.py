@@ -0,0 +1,122 @@
+import os
+import queue
+import sqlite3
+import threading
+
+# ============================================================
+# POOL DE CONEXIONES SQLITE
+# ============================================================
+# WAL permite que los lectores del catálogo no se bloqueen mientras un
+# pedido escribe; el resto ajusta caché, mmap y espera ante bloqueos.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": 5000,            # ms
+    "cache_size": -16000,            # ~16 MB por conexión
+    "mmap_size": 256 * 1024 * 1024,  # 256 MB
+}
+
+class PoolConexiones:
+    """Reutiliza conexiones SQLite entre peticiones e hilos del proceso."""
+
+    def __init__(self, database, tamano=8, timeout=30.0, pragmas=None):
+        self.database = database
+        self.tamano = tamano
+        self.timeout = timeout
+        self.pragmas = dict(PRAGMAS if pragmas is None else pragmas)
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._pid = os.getpid()
+        self._libres = queue.LifoQueue()
+        self._abiertas = 0
+        self._stats = {"checkouts": 0, "esperas": 0, "creadas": 0, "descartadas": 0}
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.database, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for nombre, valor in self.pragmas.items():
+            conn.execute(f"PRAGMA {nombre} = {valor}")
+        return conn
+
+    def obtener(self):
+        # Tras un fork (gunicorn --preload) no se heredan conexiones del padre
+        if os.getpid() != self._pid:
+            with self._lock:
+                if os.getpid() != self._pid:
+                    self._reiniciar()
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            try:
+                conn = self._libres.get_nowait()
+            except queue.Empty:
+                conn = None
+                if self._abiertas < self.tamano:
+                    self._abiertas += 1
+                    self._stats["creadas"] += 1
+                    crear = True
+                else:
+                    self._stats["esperas"] += 1
+                    crear = False
+
+        if conn is None:
+            if crear:
+                try:
+                    return self._conectar()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._abiertas -= 1
+                    raise
+            try:
+                conn = self._libres.get(timeout=self.timeout)
+            except queue.Empty:
+                raise RuntimeError("No hay conexiones libres en el pool") from None
+
+        # Verificar que la conexión sigue viva antes de entregarla
+        try:
+            conn.execute("SELECT 1")
+        except sqlite3.Error:
+            self._descartar(conn)
+            with self._lock:
+                self._abiertas += 1
+                self._stats["creadas"] += 1
+            conn = self._conectar()
+        return conn
+
+    def devolver(self, conn):
+        if os.getpid() != self._pid:
+            return
+        try:
+            # No dejar transacciones a medias para la siguiente petición
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._descartar(conn)
+            return
+        self._libres.put(conn)
+
+    def _descartar(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._abiertas -= 1
+            self._stats["descartadas"] += 1
+
+    def cerrar(self):
+        with self._lock:
+            while True:
+                try:
+                    self._libres.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._reiniciar()
+
+    def estadisticas(self):
+        with self._lock:
+            return dict(self._stats, tamano=self._abiertas,
+                        libres=self._libres.qsize(), maximo=self.tamano)
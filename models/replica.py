@@ -0,0 +1,208 @@
+import itertools
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# ============================================================
+# RÉPLICA DE LECTURA DEL CATÁLOGO (copia en memoria)
+# ============================================================
+# Un hilo por proceso copia la base principal con la API de backup de
+# SQLite a una base en memoria compartida (file:...?mode=memory&cache=shared).
+# Cada `max_antiguedad / 2` segundos revisa si hace falta copiar: sin
+# commits en la principal (PRAGMA data_version) no copia; con commits pero
+# la misma cache_version (pedidos, carritos, tareas) copia solo si la copia
+# tiene más de `refresco_maximo` segundos. Los cambios del catálogo hechos
+# desde la app suben cache_version y se copian en la revisión siguiente.
+# Las lecturas del catálogo usan conexiones de solo lectura a la copia
+# vigente; al terminar una copia nueva se cambia la referencia bajo un
+# lock, y la anterior se libera cuando se devuelve su última conexión. En
+# WAL el backup es una transacción de lectura: no bloquea a los que
+# escriben en la principal.
+logger = logging.getLogger("pixsoft.replica")
+_nombres = itertools.count(1)
+
+class Instantanea:
+    """Una copia de la base: la conexión que la mantiene viva y sus lectores."""
+
+    def __init__(self, uri, ancla, version, data_version, creada, duracion):
+        self.uri = uri
+        self.ancla = ancla
+        self.version = version      # cache_version copiada
+        self.data_version = data_version
+        self.creada = creada        # time.monotonic() al empezar la copia
+        self.verificada = creada    # Última revisión que la dio por vigente
+        self.duracion = duracion
+        self.libres = queue.LifoQueue()
+        self.vigente = True
+        self.en_uso = 0             # Conexiones prestadas (se cuenta bajo el lock de la réplica)
+
+    def conectar(self):
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        # Sin escritores en la copia: los lectores no necesitan bloqueos de tabla
+        conn.execute("PRAGMA read_uncommitted = ON")
+        return conn
+
+    def liberar(self):
+        # Cerrar la última conexión a una base en memoria la descarta
+        while True:
+            try:
+                self.libres.get_nowait().close()
+            except queue.Empty:
+                break
+        self.ancla.close()
+
+class ReplicaLectura:
+    def __init__(self, database, max_antiguedad=5.0, al_cambiar_version=None, refresco_maximo=60.0):
+        self.database = database
+        self.max_antiguedad = max_antiguedad
+        self.intervalo = max(0.2, max_antiguedad / 2)
+        self.refresco_maximo = refresco_maximo
+        self.al_cambiar_version = al_cambiar_version
+        self._lock = threading.Lock()
+        self._actual = None
+        self._origen = None  # Conexión a la principal del hilo de refresco (data_version es por conexión)
+        self._pid = None
+        self._hilo = None
+        self._detener = threading.Event()
+        self._stats = {"refrescos": 0, "sin_cambios": 0, "errores": 0, "lecturas": 0, "en_principal": 0}
+
+    # ------------------------------------------------------------
+    # Copia y cambio
+    # ------------------------------------------------------------
+    def _conexion_origen(self):
+        if self._origen is None:
+            self._origen = sqlite3.connect(self.database, timeout=30.0, check_same_thread=False)
+        return self._origen
+
+    def _cerrar_origen(self):
+        if self._origen is not None:
+            self._origen.close()
+            self._origen = None
+
+    def refrescar(self, forzar=False):
+        """Copia la base si cambió; devuelve la instantánea vigente."""
+        inicio = time.monotonic()
+        origen = self._conexion_origen()
+        data_version = origen.execute("PRAGMA data_version").fetchone()[0]
+        fila = origen.execute("SELECT version FROM cache_version WHERE id = 1").fetchone()
+        version = fila[0] if fila else 0
+        actual = self._actual
+        if actual is not None and not forzar and (
+            data_version == actual.data_version
+            or (version == actual.version and inicio - actual.creada < self.refresco_maximo)
+        ):
+            with self._lock:
+                actual.verificada = inicio
+                self._stats["sin_cambios"] += 1
+            return actual
+
+        uri = f"file:pixsoft-replica-{os.getpid()}-{next(_nombres)}?mode=memory&cache=shared"
+        ancla = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            origen.backup(ancla)
+            fila = ancla.execute("SELECT version FROM cache_version WHERE id = 1").fetchone()
+        except sqlite3.Error:
+            ancla.close()
+            raise
+        nueva = Instantanea(uri, ancla, fila[0] if fila else 0, data_version, inicio, time.monotonic() - inicio)
+
+        with self._lock:
+            anterior, self._actual = self._actual, nueva
+            self._stats["refrescos"] += 1
+            if anterior is not None:
+                anterior.vigente = False
+                liberar = anterior.en_uso == 0
+        if anterior is not None:
+            if liberar:
+                anterior.liberar()
+            if anterior.version != nueva.version and self.al_cambiar_version is not None:
+                # Lo cacheado desde la copia anterior puede ser más viejo que la nueva
+                self.al_cambiar_version()
+        return nueva
+
+    def iniciar(self):
+        """Arranca el hilo de refresco (una vez por proceso, también tras un fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._actual = None
+            self._origen = None  # La del padre no se usa tras un fork
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._refrescar_siempre, name="replica", daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(5.0)
+            if not self._hilo.is_alive():
+                self._cerrar_origen()
+        self._pid = None
+
+    def _refrescar_siempre(self):
+        while not self._detener.is_set():
+            try:
+                self.refrescar()
+            except sqlite3.Error:
+                logger.exception("No se pudo copiar la base para la réplica de lectura")
+                self._cerrar_origen()
+                with self._lock:
+                    self._stats["errores"] += 1
+            self._detener.wait(self.intervalo)
+
+    # ------------------------------------------------------------
+    # Lectores
+    # ------------------------------------------------------------
+    def obtener(self):
+        """(instantánea, conexión) de la copia vigente, o None si es muy vieja."""
+        with self._lock:
+            actual = self._actual
+            if actual is None or time.monotonic() - actual.verificada > self.max_antiguedad:
+                self._stats["en_principal"] += 1
+                return None
+            self._stats["lecturas"] += 1
+            actual.en_uso += 1
+        try:
+            return actual, actual.libres.get_nowait()
+        except queue.Empty:
+            try:
+                return actual, actual.conectar()
+            except sqlite3.Error:
+                self.devolver(actual, None)
+                raise
+
+    def devolver(self, instantanea, conn):
+        with self._lock:
+            instantanea.en_uso -= 1
+            # Bajo el lock: una copia ya reemplazada no recibe más conexiones libres
+            reusar = conn is not None and instantanea.vigente and self._pid == os.getpid()
+            if reusar:
+                instantanea.libres.put(conn)
+            liberar = not instantanea.vigente and instantanea.en_uso == 0
+        if conn is not None and not reusar:
+            conn.close()
+        if liberar:
+            instantanea.liberar()
+
+    def estadisticas(self):
+        with self._lock:
+            actual = self._actual
+            datos = dict(self._stats, max_antiguedad=self.max_antiguedad,
+                         refresco_maximo=self.refresco_maximo)
+        if actual is not None:
+            datos.update(
+                antiguedad=round(time.monotonic() - actual.creada, 3),
+                verificada_hace=round(time.monotonic() - actual.verificada, 3),
+                duracion_copia=round(actual.duracion, 4),
+                version=actual.version,
+                lectores_libres=actual.libres.qsize(),
+            )
+        return datos
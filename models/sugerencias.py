@@ -0,0 +1,201 @@
+import bisect
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+
+# ============================================================
+# SUGERENCIAS DE BÚSQUEDA (typeahead)
+# ============================================================
+# Índice en memoria: cada palabra normalizada (sin tildes ni mayúsculas) de
+# cada nombre de producto, en una lista ordenada con el id en un arreglo
+# paralelo. Un prefijo se resuelve con bisect sobre esa lista.
+#
+# El índice recuerda la versión del catálogo (cache_version) con la que se
+# construyó. Los cambios del admin en este proceso se aplican al momento;
+# si la versión cambió por otra vía (otro worker, importación masiva) la
+# siguiente consulta lanza la reconstrucción completa en un hilo con su
+# propia conexión y mientras tanto se sigue respondiendo con el índice
+# anterior. Solo la primera construcción del proceso hace esperar.
+MAX_CANDIDATOS = 500  # Palabras revisadas por consulta, acota la latencia
+PALABRA = re.compile(r"\w+")
+
+logger = logging.getLogger(__name__)
+
+def normalizar(texto):
+    sin_tildes = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in sin_tildes if not unicodedata.combining(c)).casefold()
+
+def palabras(texto):
+    return PALABRA.findall(normalizar(texto))
+
+class IndiceSugerencias:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_construir = threading.Lock()
+        self._pid = os.getpid()
+        self.version = None
+        self.construido = False
+        self.reconstruyendo = False
+        self._palabras = []       # Ordenadas por (palabra, id)
+        self._ids = array("q")
+        self._nombres = {}        # id -> (nombre original, " palabras normalizadas")
+        self._categorias = []     # (" palabras normalizadas", id, nombre)
+        self._internadas = {}     # Una sola copia de cada palabra repetida
+
+    def _palabra(self, palabra):
+        return self._internadas.setdefault(palabra, palabra)
+
+    def construir(self, db, version):
+        entradas, nombres, internadas = [], {}, {}
+        for producto_id, nombre in db.execute("SELECT id, nombre FROM productos"):
+            propias = palabras(nombre)
+            nombres[producto_id] = (nombre, " " + " ".join(propias))
+            for palabra in set(propias):
+                entradas.append((internadas.setdefault(palabra, palabra), producto_id))
+        entradas.sort()
+        categorias = [(" " + " ".join(palabras(nombre)), categoria_id, nombre)
+                      for categoria_id, nombre in db.execute("SELECT id, nombre FROM categorias ORDER BY nombre")]
+        with self._lock:
+            self._palabras = [palabra for palabra, _ in entradas]
+            self._ids = array("q", (producto_id for _, producto_id in entradas))
+            self._nombres = nombres
+            self._categorias = categorias
+            self._internadas = internadas
+            self.version = version
+            self.construido = True
+
+    def asegurar(self, pool, version):
+        """Deja el índice en `version` del catálogo.
+
+        La primera vez se construye en el momento; después, si la versión
+        cambió, se reconstruye en segundo plano y se sirve el anterior.
+        """
+        if self.version == version:
+            return
+        if self._pid != os.getpid():
+            # Tras un fork el hilo que tenía el candado no existe en el hijo
+            self._pid = os.getpid()
+            self._lock_construir = threading.Lock()
+            self.reconstruyendo = False
+        if not self.construido:
+            with self._lock_construir:
+                if not self.construido:
+                    self._construir_con(pool, version)
+            return
+        if self._lock_construir.acquire(blocking=False):
+            self.reconstruyendo = True
+            threading.Thread(target=self._reconstruir, args=(pool, version),
+                             name="sugerencias", daemon=True).start()
+
+    def _construir_con(self, pool, version):
+        db = pool.obtener()
+        try:
+            self.construir(db, version)
+        finally:
+            pool.devolver(db)
+
+    def _reconstruir(self, pool, version):
+        try:
+            self._construir_con(pool, version)
+        except sqlite3.Error:
+            # El índice anterior sigue en uso; la próxima consulta lo reintenta
+            logger.exception("No se pudo reconstruir el índice de sugerencias")
+        finally:
+            self.reconstruyendo = False
+            self._lock_construir.release()
+
+    # ------------------------------------------------------------
+    # Cambios incrementales (rutas del admin)
+    # ------------------------------------------------------------
+    def _aplicar(self, version, cambio):
+        # Solo si el índice estaba al día justo antes de este cambio; si no,
+        # se marca para reconstruir
+        with self._lock:
+            if self.version is None:
+                return
+            if version is not None and self.version != version - 1:
+                self.version = None
+                return
+            cambio()
+            if version is not None:
+                self.version = version
+
+    def _quitar(self, producto_id):
+        anterior = self._nombres.pop(producto_id, None)
+        if anterior is None:
+            return
+        for palabra in set(anterior[1].split()):
+            inicio = bisect.bisect_left(self._palabras, palabra)
+            fin = bisect.bisect_right(self._palabras, palabra, inicio)
+            i = bisect.bisect_left(self._ids, producto_id, inicio, fin)
+            if i < fin and self._ids[i] == producto_id:
+                del self._palabras[i]
+                del self._ids[i]
+
+    def _poner(self, producto_id, nombre):
+        self._quitar(producto_id)
+        propias = palabras(nombre)
+        self._nombres[producto_id] = (nombre, " " + " ".join(propias))
+        for palabra in set(propias):
+            palabra = self._palabra(palabra)
+            inicio = bisect.bisect_left(self._palabras, palabra)
+            fin = bisect.bisect_right(self._palabras, palabra, inicio)
+            i = bisect.bisect_left(self._ids, producto_id, inicio, fin)
+            self._palabras.insert(i, palabra)
+            self._ids.insert(i, producto_id)
+
+    def poner(self, producto_id, nombre, version=None):
+        """Agrega o renombra un producto. version: la nueva versión del catálogo."""
+        self._aplicar(version, lambda: self._poner(producto_id, nombre))
+
+    def quitar(self, producto_id, version=None):
+        self._aplicar(version, lambda: self._quitar(producto_id))
+
+    # ------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------
+    def buscar(self, q, limite=8):
+        """Devuelve (productos, categorias) como listas de (id, nombre).
+
+        Cada término de q debe ser prefijo de alguna palabra del nombre.
+        Primero van los nombres que empiezan con la consulta completa.
+        """
+        terminos = palabras(q)
+        if not terminos:
+            return [], []
+        consulta = " " + " ".join(terminos)
+        # El término más largo es el más selectivo para recorrer el índice;
+        # " término" dentro de " palabras" equivale a prefijo de alguna palabra
+        guia = max(terminos, key=len)
+        otros = [" " + t for t in terminos]
+        otros.remove(" " + guia)
+
+        encontrados = {}
+        with self._lock:
+            i = bisect.bisect_left(self._palabras, guia)
+            fin = min(len(self._palabras), i + MAX_CANDIDATOS)
+            while i < fin and self._palabras[i].startswith(guia):
+                producto_id = self._ids[i]
+                i += 1
+                if producto_id in encontrados:
+                    continue
+                nombre, normalizado = self._nombres[producto_id]
+                if all(t in normalizado for t in otros):
+                    encontrados[producto_id] = (not normalizado.startswith(consulta), len(nombre), nombre)
+            categorias = [
+                (categoria_id, nombre) for normalizado, categoria_id, nombre in self._categorias
+                if all(" " + t in normalizado for t in terminos)
+            ]
+
+        productos = sorted(encontrados.items(), key=lambda par: par[1])
+        return [(pid, orden[2]) for pid, orden in productos[:limite]], categorias[:limite]
+
+    def estadisticas(self):
+        with self._lock:
+            return {"version": self.version, "reconstruyendo": self.reconstruyendo,
+                    "productos": len(self._nombres),
+                    "palabras": len(self._palabras), "distintas": len(self._internadas)}
@@ -0,0 +1,282 @@
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+from flask import current_app
+from utils.imagenes import procesar_imagen
+from utils.subidas import barrer_archivos
+
+# ============================================================
+# COLA DE TAREAS (SQLite + hilos del proceso, sin broker externo)
+# ============================================================
+# encolar() inserta una fila en `tareas` dentro de la transacción de quien
+# llama; los hilos de ColaTareas la toman con un UPDATE ... RETURNING, que
+# es atómico aunque haya varios procesos (workers de gunicorn o
+# `flask tareas trabajar`) compartiendo la base. Si la tarea falla se
+# reintenta con espera exponencial hasta max_intentos.
+logger = logging.getLogger("pixsoft.tareas")
+
+TAREAS = {}  # tipo -> función(db, **datos)
+
+def tarea(tipo):
+    """Registra una función como tarea ejecutable por la cola."""
+    def registrar(funcion):
+        TAREAS[tipo] = funcion
+        return funcion
+    return registrar
+
+def encolar(db, tipo, datos=None, max_intentos=3, retraso=0.0, unica=False):
+    """Agrega una tarea; se guarda con el commit de quien llama.
+
+    Con unica=True no se agrega si ya hay una pendiente del mismo tipo
+    (barridos y recálculos que cubren todo de una vez).
+    """
+    if tipo not in TAREAS:
+        raise ValueError(f"Tarea desconocida: {tipo}")
+    if unica:
+        fila = db.execute(
+            "SELECT id FROM tareas WHERE estado = 'pendiente' AND tipo = ? LIMIT 1", (tipo,)
+        ).fetchone()
+        if fila is not None:
+            return fila[0]
+    ahora = time.time()
+    return db.execute(
+        "INSERT INTO tareas (tipo, datos, max_intentos, creada, disponible) VALUES (?, ?, ?, ?, ?)",
+        (tipo, json.dumps(datos or {}, separators=(",", ":")), max_intentos, ahora, ahora + retraso)
+    ).lastrowid
+
+def tomar(db):
+    """Marca en curso la siguiente tarea disponible y la devuelve (o None)."""
+    ahora = time.time()
+    filas = db.execute("""
+        UPDATE tareas SET estado = 'en_curso', intentos = intentos + 1, iniciada = ?
+        WHERE id = (
+            SELECT id FROM tareas WHERE estado = 'pendiente' AND disponible <= ?
+            ORDER BY disponible, id LIMIT 1
+        )
+        RETURNING id, tipo, datos, intentos, max_intentos
+    """, (ahora, ahora)).fetchall()
+    db.commit()
+    return filas[0] if filas else None
+
+def ejecutar_una(db, espera_reintento=5.0):
+    """Ejecuta una tarea pendiente. Devuelve (id, ok) o None si no había."""
+    fila = tomar(db)
+    if fila is None:
+        return None
+    tarea_id, tipo, datos, intentos, max_intentos = fila
+    try:
+        funcion = TAREAS.get(tipo)
+        if funcion is None:
+            raise LookupError(f"Tarea desconocida: {tipo}")
+        funcion(db, **json.loads(datos))
+    except Exception:
+        db.rollback()
+        error = traceback.format_exc(limit=5)
+        if intentos < max_intentos:
+            logger.warning("Tarea %s (%s) falló, intento %s de %s", tarea_id, tipo, intentos, max_intentos)
+            db.execute(
+                "UPDATE tareas SET estado = 'pendiente', error = ?, disponible = ? WHERE id = ?",
+                (error, time.time() + espera_reintento * 2 ** (intentos - 1), tarea_id)
+            )
+        else:
+            logger.error("Tarea %s (%s) falló definitivamente:\n%s", tarea_id, tipo, error)
+            db.execute(
+                "UPDATE tareas SET estado = 'fallida', error = ?, terminada = ? WHERE id = ?",
+                (error, time.time(), tarea_id)
+            )
+        db.commit()
+        return tarea_id, False
+    db.execute("UPDATE tareas SET estado = 'hecha', terminada = ? WHERE id = ?", (time.time(), tarea_id))
+    db.commit()
+    return tarea_id, True
+
+def mantenimiento(db, tiempo_maximo=300, retencion_dias=7, gracia_archivos=None):
+    """Devuelve a la cola las tareas colgadas y borra las viejas ya resueltas.
+
+    Con gracia_archivos encola también el barrido si hay archivos sin
+    referencias más viejos que eso (subidas cuyo producto nunca se guardó,
+    o que quedaron huérfanos después del barrido de su edición).
+    """
+    ahora = time.time()
+    # Un proceso que murió a mitad de una tarea la deja en curso para siempre
+    recuperadas = db.execute("""
+        UPDATE tareas SET estado = CASE WHEN intentos < max_intentos THEN 'pendiente' ELSE 'fallida' END,
+                          error = 'Tiempo máximo excedido', disponible = ?,
+                          terminada = CASE WHEN intentos < max_intentos THEN NULL ELSE ? END
+        WHERE estado = 'en_curso' AND iniciada < ?
+    """, (ahora, ahora, ahora - tiempo_maximo)).rowcount
+    borradas = db.execute(
+        "DELETE FROM tareas WHERE estado IN ('hecha', 'fallida') AND terminada < ?",
+        (ahora - retencion_dias * 86400,)
+    ).rowcount
+    if gracia_archivos is not None and db.execute(
+        "SELECT 1 FROM archivos WHERE referencias <= 0 AND creado < ? LIMIT 1", (ahora - gracia_archivos,)
+    ).fetchone():
+        encolar(db, "barrer_archivos", unica=True)
+    db.commit()
+    return recuperadas, borradas
+
+def reintentar(db, tarea_id):
+    """Vuelve a encolar una tarea fallida con sus intentos en cero."""
+    cambiadas = db.execute("""
+        UPDATE tareas SET estado = 'pendiente', intentos = 0, disponible = ?, terminada = NULL
+        WHERE id = ? AND estado = 'fallida'
+    """, (time.time(), tarea_id)).rowcount
+    db.commit()
+    return cambiadas > 0
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+def resumen_tareas(db, ventana=3600, recientes=20):
+    """Profundidad de la cola y latencias de la última `ventana` (segundos)."""
+    ahora = time.time()
+    por_estado = dict.fromkeys(("pendiente", "en_curso", "hecha", "fallida"), 0)
+    por_estado.update(db.execute("SELECT estado, COUNT(*) FROM tareas GROUP BY estado").fetchall())
+    mas_antigua = db.execute("SELECT MIN(creada) FROM tareas WHERE estado = 'pendiente'").fetchone()[0]
+
+    esperas, duraciones = [], []
+    for espera, duracion in db.execute(
+        "SELECT iniciada - creada, terminada - iniciada FROM tareas WHERE estado = 'hecha' AND terminada >= ?",
+        (ahora - ventana,)
+    ):
+        esperas.append(espera)
+        duraciones.append(duracion)
+    esperas.sort()
+    duraciones.sort()
+
+    filas = db.execute("""
+        SELECT id, tipo, estado, intentos, max_intentos, error, creada, iniciada, terminada
+        FROM tareas ORDER BY id DESC LIMIT ?
+    """, (recientes,)).fetchall()
+    return {
+        "estados": por_estado,
+        "pendiente_mas_antigua_seg": None if mas_antigua is None else round(ahora - mas_antigua, 3),
+        "ventana_seg": ventana,
+        "hechas_en_ventana": len(duraciones),
+        "espera_p50_seg": _percentil(esperas, 0.5),
+        "espera_p95_seg": _percentil(esperas, 0.95),
+        "duracion_p50_seg": _percentil(duraciones, 0.5),
+        "duracion_p95_seg": _percentil(duraciones, 0.95),
+        "recientes": [dict(fila) for fila in filas],
+    }
+
+# ============================================================
+# HILOS DE TRABAJO
+# ============================================================
+class ColaTareas:
+    """Hilos que consumen la tabla `tareas` dentro del proceso web.
+
+    Los hilos se inician en la primera petición (y de nuevo tras un fork),
+    no en create_app, para que `gunicorn --preload` no los pierda. avisar()
+    despierta a un hilo al encolar; las tareas que encolan otros procesos
+    se ven como mucho `intervalo` segundos después.
+    """
+
+    def __init__(self, app, hilos=2, intervalo=1.0, espera_reintento=5.0,
+                 tiempo_maximo=300, retencion_dias=7, intervalo_mantenimiento=60.0):
+        self.app = app
+        self.hilos = hilos
+        self.intervalo = intervalo
+        self.espera_reintento = espera_reintento
+        self.tiempo_maximo = tiempo_maximo
+        self.retencion_dias = retencion_dias
+        self.intervalo_mantenimiento = intervalo_mantenimiento
+        self._lock = threading.Lock()
+        self._evento = threading.Event()
+        self._detener = threading.Event()
+        self._pid = None
+        self._activos = []
+        self._ultimo_mantenimiento = 0.0
+        self._stats = {"hechas": 0, "errores": 0, "segundos": 0.0}
+
+    def iniciar(self):
+        if self.hilos <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._detener.clear()
+            self._activos = [
+                threading.Thread(target=self._trabajar, name=f"tareas-{i}", daemon=True)
+                for i in range(self.hilos)
+            ]
+            for hilo in self._activos:
+                hilo.start()
+
+    def detener(self, timeout=5.0):
+        self._detener.set()
+        self._evento.set()
+        for hilo in self._activos:
+            hilo.join(timeout)
+        self._activos = []
+        self._pid = None
+
+    def avisar(self):
+        self.iniciar()
+        self._evento.set()
+
+    def procesar(self, db):
+        """Ejecuta una tarea con `db`; devuelve False si no había ninguna."""
+        inicio = time.perf_counter()
+        resultado = ejecutar_una(db, self.espera_reintento)
+        if resultado is None:
+            return False
+        with self._lock:
+            self._stats["hechas" if resultado[1] else "errores"] += 1
+            self._stats["segundos"] += time.perf_counter() - inicio
+        return True
+
+    def _mantener(self, db):
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._ultimo_mantenimiento < self.intervalo_mantenimiento:
+                return
+            self._ultimo_mantenimiento = ahora
+        mantenimiento(db, self.tiempo_maximo, self.retencion_dias, self.app.config["ARCHIVOS_GRACIA"])
+
+    def _trabajar(self):
+        pool = self.app.extensions["pool"]
+        while not self._detener.is_set():
+            hubo_trabajo = False
+            try:
+                with self.app.app_context():
+                    db = pool.obtener()
+                    try:
+                        self._mantener(db)
+                        hubo_trabajo = self.procesar(db)
+                    finally:
+                        pool.devolver(db)
+            except Exception:
+                logger.exception("Error en el hilo de tareas")
+            if not hubo_trabajo:
+                self._evento.wait(self.intervalo)
+                self._evento.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            return dict(self._stats, hilos=len(self._activos) if self._pid == os.getpid() else 0)
+
+# ============================================================
+# TAREAS DISPONIBLES
+# ============================================================
+@tarea("imagen_derivados")
+def imagen_derivados(db, nombre):
+    if procesar_imagen(db, current_app.config["UPLOAD_FOLDER"], nombre) is not None:
+        # Las páginas cacheadas todavía no tienen el srcset nuevo. Solo la
+        # caché local: subir cache_version vaciaría la de todos los procesos
+        # y reconstruiría el índice de sugerencias; los demás lo ven al
+        # vencer CACHE_TTL.
+        current_app.extensions["cache_catalogo"].invalidar()
+
+@tarea("barrer_archivos")
+def barrer_archivos_huerfanos(db):
+    borrados = barrer_archivos(db, current_app.config["UPLOAD_FOLDER"], current_app.config["ARCHIVOS_GRACIA"])
+    if borrados:
+        logger.info("Archivos sin referencias borrados: %s", borrados)
@@ -0,0 +1,113 @@
+# ============================================================
+# ANALÍTICA DE VENTAS (tablas resumen)
+# ============================================================
+# Cada pedido suma sus líneas a ventas_dia, ventas_producto_dia y
+# ventas_categoria_dia dentro de la misma transacción del checkout, así el
+# panel lee solo los resúmenes y no recorre pedidos. Los días son UTC
+# (pedidos.fecha usa CURRENT_TIMESTAMP). categoria_id 0 = sin categoría.
+LOTE_PEDIDOS = 1000
+
+def acumular_ventas(db, desde_id, hasta_id=None):
+    """Suma a los resúmenes los pedidos con id entre desde_id y hasta_id.
+
+    Debe llamarse dentro de la transacción que insertó los pedidos.
+    """
+    rango = (desde_id, desde_id if hasta_id is None else hasta_id)
+    db.execute("""
+        INSERT INTO ventas_dia (dia, pedidos, unidades, ingresos)
+        SELECT date(p.fecha), COUNT(DISTINCT p.id), SUM(i.cantidad), SUM(i.subtotal)
+        FROM pedidos p
+        JOIN pedido_items i ON i.pedido_id = p.id
+        WHERE p.id BETWEEN ? AND ?
+        GROUP BY date(p.fecha)
+        ON CONFLICT (dia) DO UPDATE SET
+            pedidos = pedidos + excluded.pedidos,
+            unidades = unidades + excluded.unidades,
+            ingresos = ingresos + excluded.ingresos
+    """, rango)
+    db.execute("""
+        INSERT INTO ventas_producto_dia (dia, producto_id, nombre, unidades, ingresos)
+        SELECT date(p.fecha), COALESCE(i.producto_id, 0), MAX(i.nombre), SUM(i.cantidad), SUM(i.subtotal)
+        FROM pedidos p
+        JOIN pedido_items i ON i.pedido_id = p.id
+        WHERE p.id BETWEEN ? AND ?
+        GROUP BY date(p.fecha), COALESCE(i.producto_id, 0)
+        ON CONFLICT (dia, producto_id) DO UPDATE SET
+            nombre = excluded.nombre,
+            unidades = unidades + excluded.unidades,
+            ingresos = ingresos + excluded.ingresos
+    """, rango)
+    # La categoría es la del producto al momento de acumular
+    db.execute("""
+        INSERT INTO ventas_categoria_dia (dia, categoria_id, unidades, ingresos)
+        SELECT date(p.fecha), COALESCE(pr.categoria_id, 0), SUM(i.cantidad), SUM(i.subtotal)
+        FROM pedidos p
+        JOIN pedido_items i ON i.pedido_id = p.id
+        LEFT JOIN productos pr ON pr.id = i.producto_id
+        WHERE p.id BETWEEN ? AND ?
+        GROUP BY date(p.fecha), COALESCE(pr.categoria_id, 0)
+        ON CONFLICT (dia, categoria_id) DO UPDATE SET
+            unidades = unidades + excluded.unidades,
+            ingresos = ingresos + excluded.ingresos
+    """, rango)
+
+def reconstruir_ventas(db, lote=LOTE_PEDIDOS):
+    """Vuelve a calcular los resúmenes desde pedidos, en lotes de pedidos.
+
+    Los pedidos confirmados durante la reconstrucción ya se acumulan solos en
+    el checkout, por eso solo se recorren los que existían al vaciar las tablas.
+    Devuelve la cantidad de pedidos procesados.
+    """
+    with db:
+        db.execute("DELETE FROM ventas_dia")
+        db.execute("DELETE FROM ventas_producto_dia")
+        db.execute("DELETE FROM ventas_categoria_dia")
+        hasta = db.execute("SELECT COALESCE(MAX(id), 0) FROM pedidos").fetchone()[0]
+
+    procesados, ultimo = 0, 0
+    while ultimo < hasta:
+        ids = db.execute(
+            "SELECT id FROM pedidos WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+            (ultimo, hasta, lote)
+        ).fetchall()
+        if not ids:
+            break
+        with db:
+            acumular_ventas(db, ids[0][0], ids[-1][0])
+        ultimo = ids[-1][0]
+        procesados += len(ids)
+    return procesados
+
+def resumen_ventas(db, desde, hasta, top=10):
+    """Datos del panel de ventas entre dos días (YYYY-MM-DD, inclusive)."""
+    rango = (desde, hasta)
+    por_dia = db.execute(
+        "SELECT dia, pedidos, unidades, ingresos FROM ventas_dia "
+        "WHERE dia BETWEEN ? AND ? ORDER BY dia", rango
+    ).fetchall()
+    por_categoria = db.execute("""
+        SELECT v.categoria_id, COALESCE(c.nombre, 'Sin categoría') AS nombre,
+               SUM(v.unidades) AS unidades, SUM(v.ingresos) AS ingresos
+        FROM ventas_categoria_dia v
+        LEFT JOIN categorias c ON c.id = v.categoria_id
+        WHERE v.dia BETWEEN ? AND ?
+        GROUP BY v.categoria_id
+        ORDER BY ingresos DESC
+    """, rango).fetchall()
+    top_productos = db.execute("""
+        SELECT producto_id, MAX(nombre) AS nombre, SUM(unidades) AS unidades, SUM(ingresos) AS ingresos
+        FROM ventas_producto_dia
+        WHERE dia BETWEEN ? AND ?
+        GROUP BY producto_id
+        ORDER BY ingresos DESC
+        LIMIT ?
+    """, rango + (top,)).fetchall()
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "pedidos": sum(fila["pedidos"] for fila in por_dia),
+        "ingresos": sum(fila["ingresos"] for fila in por_dia),
+        "por_dia": [dict(fila) for fila in por_dia],
+        "por_categoria": [dict(fila) for fila in por_categoria],
+        "top_productos": [dict(fila) for fila in top_productos],
+    }
@@ -1,80 +1,214 @@
-from flask import Blueprint, render_template, request, redirect, url_for
-from werkzeug.utils import secure_filename
-from models.db import get_db
+import math
+from flask import Blueprint, Response, render_template, request, redirect, url_for, current_app, stream_with_context
+from models.db import get_db, get_pool, get_cache, get_sugerencias, get_tareas
+from models.catalogo import pagina_catalogo, pagina_a_dict, quiere_json, listar_categorias
 from utils.decorators import admin_required
-import os
-from config import Config
+from models.ventas import resumen_ventas
+from models.importacion import ImportacionInvalida, leer_archivo, formato_de, importar_productos, exportar_productos
+from models.tareas import encolar, reintentar, resumen_tareas
+from utils.subidas import ImagenInvalida, guardar_subida
+from datetime import date, datetime, timedelta, timezone
 
 bp = Blueprint("admin", __name__, url_prefix="/admin")
 
+def guardar_imagen(db, archivo):
+    config = current_app.config
+    return guardar_subida(db, archivo, config["UPLOAD_FOLDER"],
+                          config["IMAGEN_MAX_BYTES"], config["IMAGEN_MAX_LADO"])
+
+def encolar_barrido(db):
+    # Los archivos que quedaron sin productos se borran en un solo barrido,
+    # cuando ya pasó la gracia (antes barrer_archivos no los tocaría)
+    config = current_app.config
+    encolar(db, "barrer_archivos", max_intentos=config["TAREAS_INTENTOS"],
+            retraso=config["ARCHIVOS_GRACIA"] + 1, unica=True)
+
+def encolar_derivados(db, img):
+    # Las miniaturas WebP/AVIF se generan fuera de la petición
+    if img:
+        encolar(db, "imagen_derivados", {"nombre": img}, current_app.config["TAREAS_INTENTOS"])
+
+def validar_producto(db, form):
+    nombre = form.get("nombre", "").strip()
+    precio = form.get("precio", "").strip()
+    categoria_id = form.get("categoria", "").strip()
+    if not nombre or not precio or not categoria_id:
+        return None, "Por favor completa todos los campos obligatorios"
+    try:
+        precio = float(precio)
+    except ValueError:
+        return None, "El precio debe ser un número válido"
+    if not math.isfinite(precio) or precio < 0:
+        return None, "El precio debe ser un número válido"
+    # Con foreign_keys=ON una categoría inexistente haría fallar el INSERT/UPDATE
+    if not db.execute("SELECT 1 FROM categorias WHERE id=?", (categoria_id,)).fetchone():
+        return None, "La categoría seleccionada no existe"
+    return (nombre, precio, categoria_id), None
+
 @bp.route("/productos")
 @admin_required
 def admin_productos():
-    q = request.args.get("q", "")
-    db = get_db()
-    query = """
-        SELECT p.*, c.nombre AS categoria_nombre
-        FROM productos p
-        LEFT JOIN categorias c ON p.categoria_id = c.id
-    """
-    if q:
-        query += " WHERE p.nombre LIKE ? OR c.nombre LIKE ?"
-        productos = db.execute(query, (f"%{q}%", f"%{q}%")).fetchall()
-    else:
-        query += " ORDER BY p.id DESC"
-        productos = db.execute(query).fetchall()
-    return render_template("admin_productos.html", productos=productos, q=q)
+    q = request.args.get("q", "").strip()
+    pagina = pagina_catalogo(get_db(), get_cache(), request.args, current_app.config, q)
+    if quiere_json(request):
+        return pagina_a_dict(pagina)
+    return render_template("admin_productos.html", productos=pagina.productos, q=q,
+                           siguiente=pagina.siguiente, anterior=pagina.anterior)
+
+@bp.route("/pool")
+@admin_required
+def admin_pool():
+    return get_pool().estadisticas()
+
+@bp.route("/cache")
+@admin_required
+def admin_cache():
+    return dict(get_cache().estadisticas(), sugerencias=get_sugerencias().estadisticas())
+
+@bp.route("/tareas")
+@admin_required
+def admin_tareas():
+    resumen = resumen_tareas(get_db())
+    resumen["hilos"] = get_tareas().estadisticas()
+    if quiere_json(request):
+        return resumen
+    return render_template("admin_tareas.html", **resumen)
+
+@bp.route("/tareas/<int:id>/reintentar", methods=["POST"])
+@admin_required
+def reintentar_tarea(id):
+    if not reintentar(get_db(), id):
+        return "La tarea no existe o no está fallida", 409
+    get_tareas().avisar()
+    return redirect(url_for("admin.admin_tareas"))
+
+@bp.route("/replica")
+@admin_required
+def admin_replica():
+    replica = current_app.extensions.get("replica")
+    if replica is None:
+        return {"activa": False}
+    return dict(replica.estadisticas(), activa=True)
+
+@bp.route("/limites")
+@admin_required
+def admin_limites():
+    limitador = current_app.extensions.get("limites")
+    if limitador is None:
+        return {"activos": False}
+    return dict(limitador.estadisticas(), activos=True)
+
+@bp.route("/ventas")
+@admin_required
+def admin_ventas():
+    # Por defecto los últimos 30 días (UTC, como pedidos.fecha); solo se leen las tablas resumen
+    hoy = datetime.now(timezone.utc).date()
+    try:
+        hasta = date.fromisoformat(request.args.get("hasta") or hoy.isoformat())
+        desde = date.fromisoformat(request.args.get("desde") or (hasta - timedelta(days=29)).isoformat())
+    except ValueError:
+        return "Fecha inválida (usa AAAA-MM-DD)", 400
+    resumen = resumen_ventas(get_db(), desde.isoformat(), hasta.isoformat())
+    if quiere_json(request):
+        return resumen
+    return render_template("admin_ventas.html", **resumen)
+
+@bp.route("/productos/importar", methods=["GET", "POST"])
+@admin_required
+def importar():
+    reporte, error = None, None
+    if request.method == "POST":
+        # Los catálogos de proveedores superan el límite general de subida
+        request.max_content_length = current_app.config["IMPORTACION_MAX_BYTES"]
+        archivo = request.files.get("archivo")
+        if not archivo or archivo.filename == "":
+            error = "Selecciona un archivo CSV o JSON"
+        else:
+            formato = request.form.get("formato") or formato_de(archivo.filename)
+            db = get_db()
+            try:
+                reporte = importar_productos(db, leer_archivo(archivo.stream, formato))
+            except ImportacionInvalida as e:
+                error = str(e)
+            else:
+                if reporte["guardadas"]:
+                    get_cache().invalidar(db)
+        if quiere_json(request):
+            return (reporte, 200) if reporte else ({"error": error}, 400)
+    return render_template("admin_importar.html", reporte=reporte, error=error)
+
+@bp.route("/productos/exportar")
+@admin_required
+def exportar():
+    formato = request.args.get("formato", "csv")
+    if formato not in ("csv", "json"):
+        return "Formato no soportado", 400
+    # La respuesta se genera por lotes mientras se envía; nunca está completa en memoria
+    filas = exportar_productos(get_db(), formato)
+    mimetype = "text/csv" if formato == "csv" else "application/json"
+    return Response(stream_with_context(filas), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=productos.{formato}"
+    })
 
 @bp.route("/productos/add", methods=["GET", "POST"])
 @admin_required
 def add_producto():
     db = get_db()
-    categorias = db.execute("SELECT id, nombre FROM categorias ORDER BY nombre").fetchall()
+    cache = get_cache()
+    categorias = cache.obtener(db, ("categorias",), lambda: listar_categorias(db))
+    error = None
     if request.method == "POST":
-        nombre = request.form.get("nombre")
-        precio = request.form.get("precio")
-        categoria_id = request.form.get("categoria")
-        archivo = request.files.get("img")
-        if archivo and archivo.filename != "":
-            nombre_archivo = secure_filename(archivo.filename)
-            archivo.save(os.path.join(Config.UPLOAD_FOLDER, nombre_archivo))
-        else:
-            nombre_archivo = None
-        db.execute(
-            "INSERT INTO productos (nombre, precio, img, categoria_id) VALUES (?, ?, ?, ?)",
-            (nombre, precio, nombre_archivo, categoria_id)
-        )
-        db.commit()
-        return redirect(url_for("admin.admin_productos"))
-    return render_template("add_producto.html", categorias=categorias)
+        datos, error = validar_producto(db, request.form)
+        if datos:
+            nombre, precio, categoria_id = datos
+            try:
+                img = guardar_imagen(db, request.files.get("img")) or request.form.get("img", "").strip() or None
+            except ImagenInvalida as e:
+                return render_template("add_producto.html", categorias=categorias, error=str(e)), 400
+            producto_id = db.execute(
+                "INSERT INTO productos (nombre, precio, img, categoria_id) VALUES (?, ?, ?, ?)",
+                (nombre, precio, img, categoria_id)
+            ).lastrowid
+            encolar_derivados(db, img)
+            db.commit()
+            get_tareas().avisar()
+            cache.invalidar(db)
+            get_sugerencias().poner(producto_id, nombre, cache.version)
+            return redirect(url_for("admin.admin_productos"))
+    return render_template("add_producto.html", categorias=categorias, error=error)
 
 @bp.route("/productos/edit/<int:id>", methods=["GET", "POST"])
 @admin_required
 def edit_producto(id):
     db = get_db()
-    categorias = db.execute("SELECT id, nombre FROM categorias ORDER BY nombre").fetchall()
+    cache = get_cache()
+    categorias = cache.obtener(db, ("categorias",), lambda: listar_categorias(db))
     producto = db.execute("SELECT * FROM productos WHERE id=?", (id,)).fetchone()
     if not producto:
         return "Producto no encontrado", 404
     error = None
     if request.method == "POST":
-        nombre = request.form.get("nombre")
-        precio = request.form.get("precio")
-        categoria_id = request.form.get("categoria")
-        img_file = request.files.get("img")
-        if img_file and img_file.filename != "":
-            img = secure_filename(img_file.filename)
-            img_file.save(os.path.join(Config.UPLOAD_FOLDER, img))
-        else:
-            img = producto["img"]
-        if not nombre or not precio or not categoria_id:
-            error = "Completa todos los campos"
-        else:
+        datos, error = validar_producto(db, request.form)
+        if datos:
+            nombre, precio, categoria_id = datos
+            # Archivo subido, o nombre escrito a mano, o se conserva la imagen actual
+            try:
+                img = (guardar_imagen(db, request.files.get("img"))
+                       or request.form.get("img", "").strip() or producto["img"])
+            except ImagenInvalida as e:
+                return render_template("edit_producto.html", producto=producto,
+                                       categorias=categorias, error=str(e)), 400
             db.execute(
                 "UPDATE productos SET nombre=?, precio=?, img=?, categoria_id=? WHERE id=?",
                 (nombre, precio, img, categoria_id, id)
             )
+            if img != producto["img"]:
+                encolar_derivados(db, img)
+                encolar_barrido(db)
             db.commit()
+            get_tareas().avisar()
+            cache.invalidar(db)
+            get_sugerencias().poner(id, nombre, cache.version)
             return redirect(url_for("admin.admin_productos"))
     return render_template("edit_producto.html", producto=producto, categorias=categorias, error=error)
 
@@ -83,5 +217,10 @@ def edit_producto(id):
 def delete_producto(id):
     db = get_db()
     db.execute("DELETE FROM productos WHERE id=?", (id,))
+    encolar_barrido(db)
     db.commit()
+    get_tareas().avisar()
+    cache = get_cache()
+    cache.invalidar(db)
+    get_sugerencias().quitar(id, cache.version)
     return redirect(url_for("admin.admin_productos"))
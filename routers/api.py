@@ -0,0 +1,88 @@
+from flask import Blueprint, request, current_app, jsonify
+from models.db import get_db_lectura, get_cache
+from models.catalogo import (MAX_ID, CampoInvalido, campos_api, filas_a_tuplas, pagina_catalogo,
+                             obtener_producto, categorias_con_total)
+from utils.assets import asset_url
+from utils.respuestas import preparar, respuesta_json
+
+# ============================================================
+# API JSON DEL CATÁLOGO (solo lectura)
+# ============================================================
+# Mismas consultas y caché que index(). Los productos van como arreglos en
+# el orden de "campos" (?campos=id,nombre,precio) para que la respuesta
+# sea chica; el cuerpo ya serializado se cachea y se sirve con ETag y gzip.
+bp = Blueprint("api", __name__, url_prefix="/api")
+
+def error_api(mensaje, estado):
+    return jsonify({"error": mensaje}), estado
+
+def _servir(clave, calcular):
+    """Responde desde la caché del catálogo o calcula, serializa y guarda."""
+    db = get_db_lectura()
+    cache = get_cache()
+    preparada, generacion = cache.buscar(db, clave)
+    if preparada is None:
+        datos = calcular(db)
+        if datos is None:
+            return error_api("No encontrado", 404)
+        preparada = preparar(datos, cache.version)
+        cache.guardar(clave, preparada, generacion)
+    return respuesta_json(preparada)
+
+def _valores(filas, campos):
+    valores = filas_a_tuplas(filas, campos)
+    if "img" not in campos:
+        return valores
+    # La imagen se entrega como URL (con huella si hay manifiesto)
+    i = campos.index("img")
+    urls = {}
+    for n, fila in enumerate(valores):
+        nombre = fila[i] or "noimage.png"
+        url = urls.get(nombre)
+        if url is None:
+            url = urls[nombre] = asset_url("imagenes/" + nombre)
+        valores[n] = fila[:i] + (url,) + fila[i + 1:]
+    return valores
+
+@bp.route("/productos")
+def productos():
+    try:
+        campos = campos_api(request.args.get("campos"))
+    except CampoInvalido as e:
+        return error_api(str(e), 400)
+    q = request.args.get("q", "").strip()
+
+    def calcular(db):
+        pagina = pagina_catalogo(db, get_cache(), request.args, current_app.config, q)
+        return {
+            "campos": campos,
+            "productos": _valores(pagina.productos, campos),
+            "siguiente": pagina.siguiente,
+            "anterior": pagina.anterior,
+        }
+    return _servir(("api", "productos", request.query_string), calcular)
+
+@bp.route("/productos/<int:producto_id>")
+def producto(producto_id):
+    if producto_id > MAX_ID:
+        return error_api("No encontrado", 404)
+    try:
+        campos = campos_api(request.args.get("campos"))
+    except CampoInvalido as e:
+        return error_api(str(e), 400)
+
+    def calcular(db):
+        fila = obtener_producto(db, producto_id)
+        if fila is None:
+            return None
+        return dict(zip(campos, _valores([fila], campos)[0]))
+    return _servir(("api", "producto", producto_id, tuple(campos)), calcular)
+
+@bp.route("/categorias")
+def categorias():
+    def calcular(db):
+        return {
+            "campos": ["id", "nombre", "total"],
+            "categorias": [tuple(fila) for fila in categorias_con_total(db)],
+        }
+    return _servir(("api", "categorias"), calcular)
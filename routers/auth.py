@@ -1,9 +1,10 @@
+import sqlite3
 from flask import Blueprint, request, session, redirect, url_for, render_template
 from models.db import get_db
 
-bp = Blueprint("auth", __name__, url_prefix="/auth")
+bp = Blueprint("auth", __name__)
 
-@bp.route("/login", methods=["GET", "POST"])
+@bp.route("/loginuser", methods=["GET", "POST"])
 def loginuser():
     error = None
     if request.method == "POST":
@@ -51,6 +52,6 @@ def register_user():
                 session["user"] = nombre
                 session["user_email"] = email
                 return redirect(url_for("public.index"))
-            except:
+            except sqlite3.IntegrityError:
                 error = "El correo ya está registrado"
     return render_template("register.html", error=error)
@@ -1,37 +1,88 @@
 from flask import Blueprint, session, request, jsonify, render_template
 from models.db import get_db
-from utils.decorators import login_required
+from models.pedidos import CarritoInvalido, cantidades_carrito, crear_pedido, es_entero
+from models.catalogo import MAX_ID
+from models.carritos import (CarritoDesactualizado, obtener_carrito, contenido_carrito, validar_id,
+                             validar_cantidad, cambiar_item, fusionar_carrito, confirmar_carrito)
 
 bp = Blueprint("carrito", __name__)
 
+def error_json(mensaje, estado):
+    return jsonify({"success": False, "error": mensaje}), estado
+
 @bp.route("/carrito")
-@login_required
 def carrito():
     return render_template("carrito.html")
 
 @bp.route("/confirmar_compra", methods=["POST"])
-@login_required
 def confirmar_compra():
-    import json
+    if not session.get("user_email"):
+        return error_json("Debes iniciar sesión", 401)
+    datos = request.get_json(silent=True)
+    db = get_db()
+    try:
+        if isinstance(datos, dict) and "carrito_id" in datos:
+            # Checkout normal: solo se confirma el carrito guardado en el servidor
+            carrito_id = validar_id(datos["carrito_id"], "Carrito inválido")
+            version = datos.get("version")
+            if version is not None and (not es_entero(version) or not 0 <= version <= MAX_ID):
+                raise CarritoInvalido("Carrito inválido")
+            pedido_id, total = confirmar_carrito(db, carrito_id, session["user_email"], version)
+        else:
+            # Compatibilidad: carrito completo enviado desde localStorage
+            pedido_id, total = crear_pedido(db, session["user_email"], cantidades_carrito(datos))
+    except CarritoDesactualizado as e:
+        return error_json(str(e), 409)
+    except CarritoInvalido as e:
+        return error_json(str(e), 400)
+    return jsonify({"success": True, "pedido_id": pedido_id, "total": total})
+
+# ============================================================
+# API DEL CARRITO (usuarios con sesión)
+# ============================================================
+@bp.route("/api/carrito")
+def api_carrito():
+    if not session.get("user_email"):
+        return error_json("Debes iniciar sesión", 401)
+    db = get_db()
+    carrito_id, _ = obtener_carrito(db, session["user_email"])
+    return jsonify(contenido_carrito(db, carrito_id))
+
+@bp.route("/api/carrito/items", methods=["POST"])
+@bp.route("/api/carrito/items/<int:producto_id>", methods=["PUT", "DELETE"])
+def api_carrito_item(producto_id=None):
+    """POST suma {"id", "cantidad"}; PUT fija {"cantidad"}; DELETE quita el producto."""
+    if not session.get("user_email"):
+        return error_json("Debes iniciar sesión", 401)
+    if producto_id is not None and producto_id > MAX_ID:
+        return error_json("Producto no encontrado", 404)
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict):
+        datos = {}
+    db = get_db()
+    try:
+        if request.method == "POST":
+            producto_id = validar_id(datos.get("id"), "Producto inválido")
+            cantidad = validar_cantidad(datos.get("cantidad", 1), minimo=1)
+        elif request.method == "PUT":
+            cantidad = validar_cantidad(datos.get("cantidad"))
+        else:
+            cantidad = 0
+        carrito_id, _ = obtener_carrito(db, session["user_email"])
+        resumen = cambiar_item(db, carrito_id, producto_id, cantidad, sumar=request.method == "POST")
+    except CarritoInvalido as e:
+        return error_json(str(e), 400)
+    return jsonify(resumen)
+
+@bp.route("/api/carrito/fusionar", methods=["POST"])
+def api_carrito_fusionar():
+    """Mezcla el carrito de localStorage con el del servidor al iniciar sesión."""
+    if not session.get("user_email"):
+        return error_json("Debes iniciar sesión", 401)
     db = get_db()
-    data = request.get_json()
-    user_email = session["user_email"]
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS pedidos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_email TEXT,
-            producto_id INTEGER,
-            nombre TEXT,
-            precio REAL,
-            cantidad INTEGER,
-            subtotal REAL,
-            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    for item in data:
-        db.execute(
-            "INSERT INTO pedidos (user_email, producto_id, nombre, precio, cantidad, subtotal) VALUES (?, ?, ?, ?, ?, ?)",
-            (user_email, item.get("id"), item.get("name"), item.get("price"), item.get("quantity"), item.get("price")*item.get("quantity"))
-        )
-    db.commit()
-    return jsonify({"success": True})
+    try:
+        cantidades = cantidades_carrito(request.get_json(silent=True))
+        carrito_id, _ = obtener_carrito(db, session["user_email"])
+        return jsonify(fusionar_carrito(db, carrito_id, cantidades))
+    except CarritoInvalido as e:
+        return error_json(str(e), 400)
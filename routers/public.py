@@ -1,42 +1,71 @@
-from flask import Blueprint, render_template, request
-from models.db import get_db
+from flask import Blueprint, render_template, request, current_app, jsonify
+from models.db import get_db, get_db_lectura, get_pool, get_cache, get_sugerencias
+from utils.decorators import cache_pagina
+from models.catalogo import pagina_catalogo, pagina_a_dict, quiere_json, productos_por_categoria
 
 bp = Blueprint("public", __name__)
 
 @bp.route("/")
+@cache_pagina
 def index():
-    q = request.args.get("q", "")
-    db = get_db()
-    query = """
-        SELECT p.*, c.nombre AS categoria_nombre
-        FROM productos p
-        LEFT JOIN categorias c ON p.categoria_id = c.id
-    """
-    if q:
-        query += " WHERE p.nombre LIKE ? OR c.nombre LIKE ?"
-        productos = db.execute(query, (f"%{q}%", f"%{q}%")).fetchall()
-    else:
-        query += " ORDER BY p.id DESC"
-        productos = db.execute(query).fetchall()
-    return render_template("index.html", productos=productos, q=q)
+    q = request.args.get("q", "").strip()
+    pagina = pagina_catalogo(get_db_lectura(), get_cache(), request.args, current_app.config, q)
+    if quiere_json(request):
+        return pagina_a_dict(pagina)
+    return render_template("index.html", productos=pagina.productos, query=q,
+                           siguiente=pagina.siguiente, anterior=pagina.anterior)
+
+@bp.route("/buscar", methods=["GET"])
+def buscar():
+    query = request.args.get("q", "").strip()
+    # Busca productos por nombre o por categoría (sin query se listan todos)
+    pagina = pagina_catalogo(get_db_lectura(), get_cache(), request.args, current_app.config, query)
+    if quiere_json(request):
+        return pagina_a_dict(pagina)
+    return render_template("index.html", productos=pagina.productos, query=query,
+                           siguiente=pagina.siguiente, anterior=pagina.anterior)
+
+@bp.route("/api/sugerencias")
+def sugerencias():
+    q = request.args.get("q", "").strip()[:100]
+    limite = min(max(request.args.get("limite", 8, type=int), 1), 20)
+    indice = get_sugerencias()
+    indice.asegurar(get_pool(), get_cache().version_actual(get_db()))
+    productos, categorias = indice.buscar(q, limite)
+    respuesta = jsonify({
+        "q": q,
+        "productos": [{"id": pid, "nombre": nombre} for pid, nombre in productos],
+        "categorias": [{"id": cid, "nombre": nombre} for cid, nombre in categorias],
+    })
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = 30
+    return respuesta
 
 @bp.route("/categorias")
+@cache_pagina
 def categorias():
     q = request.args.get("q", "")
-    db = get_db()
-    query = "SELECT * FROM categorias"
-    if q:
-        query += " WHERE nombre LIKE ?"
-        categorias = db.execute(query, (f"%{q}%",)).fetchall()
-    else:
-        query += " ORDER BY nombre"
-        categorias = db.execute(query).fetchall()
-    return render_template("categorias.html", categorias=categorias, q=q)
+    db = get_db_lectura()
+    limite = current_app.config["CATEGORIA_MAX_PRODUCTOS"]
+    # Categorías y sus productos más recientes en una sola consulta
+    categorias, por_categoria = get_cache().obtener(
+        db, ("categorias_productos", limite, q),
+        lambda: productos_por_categoria(db, limite, q)
+    )
+    return render_template("categorias.html", categorias=categorias,
+                           productos_por_categoria=por_categoria, q=q)
 
 @bp.route("/ayuda")
+@cache_pagina
 def ayuda():
     return render_template("ayuda.html")
 
 @bp.route("/arriendos")
+@cache_pagina
 def arriendos():
     return render_template("arriendos.html")
+
+@bp.route("/pedidos")
+@cache_pagina
+def pedidos():
+    return render_template("pedidos.html")
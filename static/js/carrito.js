@@ -0,0 +1,86 @@
+// ============================================================
+// CARRITO
+// ============================================================
+// Sin sesión el carrito vive en localStorage. Con sesión vive en el
+// servidor: cada cambio es una petición pequeña a /api/carrito y el
+// checkout solo envía el id y la versión del carrito.
+const Carrito = (() => {
+    const conSesion = document.body.dataset.usuario === "1";
+
+    function local() {
+        return JSON.parse(localStorage.getItem("cart")) || [];
+    }
+
+    function guardarLocal(cart) {
+        localStorage.setItem("cart", JSON.stringify(cart));
+    }
+
+    function resumenLocal() {
+        const items = local().map(item => ({
+            id: item.id, nombre: item.name, precio: item.price,
+            cantidad: item.quantity, subtotal: item.price * item.quantity
+        }));
+        return {
+            items,
+            total: items.reduce((suma, item) => suma + item.subtotal, 0),
+            unidades: items.reduce((suma, item) => suma + item.cantidad, 0)
+        };
+    }
+
+    async function api(metodo, url, cuerpo) {
+        const opciones = {method: metodo, headers: {"Content-Type": "application/json"}};
+        if (cuerpo !== undefined) opciones.body = JSON.stringify(cuerpo);
+        const respuesta = await fetch(url, opciones);
+        const datos = await respuesta.json();
+        if (!respuesta.ok) throw new Error(datos.error || respuesta.statusText);
+        return datos;
+    }
+
+    // Al iniciar sesión, el carrito del navegador se mezcla con el del servidor
+    let listo = Promise.resolve();
+    if (conSesion && local().length) {
+        listo = api("POST", "/api/carrito/fusionar", local())
+            .then(() => localStorage.removeItem("cart"))
+            .catch(error => console.error("No se pudo fusionar el carrito:", error));
+    }
+
+    async function obtener() {
+        await listo;
+        return conSesion ? api("GET", "/api/carrito") : resumenLocal();
+    }
+
+    async function agregar(id, name, price) {
+        await listo;
+        if (conSesion) return api("POST", "/api/carrito/items", {id, cantidad: 1});
+        const cart = local();
+        const existente = cart.find(item => item.id === id);
+        if (existente) {
+            existente.quantity += 1;
+        } else {
+            cart.push({id, name, price, quantity: 1});
+        }
+        guardarLocal(cart);
+        return resumenLocal();
+    }
+
+    async function cambiar(id, cantidad) {
+        await listo;
+        if (conSesion) {
+            return cantidad > 0
+                ? api("PUT", `/api/carrito/items/${id}`, {cantidad})
+                : api("DELETE", `/api/carrito/items/${id}`);
+        }
+        const cart = local()
+            .map(item => item.id === id ? {...item, quantity: cantidad} : item)
+            .filter(item => item.quantity > 0);
+        guardarLocal(cart);
+        return resumenLocal();
+    }
+
+    async function confirmar(carrito) {
+        if (!conSesion) throw new Error("Debes iniciar sesión");
+        return api("POST", "/confirmar_compra", {carrito_id: carrito.id, version: carrito.version});
+    }
+
+    return {conSesion, obtener, agregar, cambiar, confirmar};
+})();
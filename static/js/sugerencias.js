@@ -0,0 +1,42 @@
+// ============================================================
+// SUGERENCIAS DE BÚSQUEDA
+// ============================================================
+// Completa los campos de búsqueda con data-sugerencias usando
+// /api/sugerencias. Espera a que el usuario deje de escribir (debounce) y
+// cancela la petición anterior si todavía no respondió.
+document.querySelectorAll("input[data-sugerencias]").forEach(input => {
+    const lista = document.createElement("datalist");
+    lista.id = "sugerencias-" + Math.random().toString(36).slice(2);
+    input.setAttribute("list", lista.id);
+    input.setAttribute("autocomplete", "off");
+    input.after(lista);
+
+    let temporizador = null;
+    let pendiente = null;
+
+    input.addEventListener("input", () => {
+        clearTimeout(temporizador);
+        const q = input.value.trim();
+        if (q.length < 2) {
+            lista.innerHTML = "";
+            return;
+        }
+        temporizador = setTimeout(() => {
+            if (pendiente) pendiente.abort();
+            pendiente = new AbortController();
+            fetch(`${input.dataset.sugerencias}?q=${encodeURIComponent(q)}`, {signal: pendiente.signal})
+                .then(respuesta => respuesta.json())
+                .then(datos => {
+                    lista.innerHTML = "";
+                    [...datos.categorias, ...datos.productos].forEach(item => {
+                        const opcion = document.createElement("option");
+                        opcion.value = item.nombre;
+                        lista.appendChild(opcion);
+                    });
+                })
+                .catch(error => {
+                    if (error.name !== "AbortError") console.error(error);
+                });
+        }, 150);
+    });
+});
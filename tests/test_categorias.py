@@ -0,0 +1,41 @@
+import sqlite3
+from app import create_app
+
+# ============================================================
+# /categorias: misma cantidad de consultas con pocas o muchas categorías
+# ============================================================
+def consultas_categorias(ruta, categorias_extra):
+    app = create_app({
+        "DATABASE": str(ruta), "METRICAS": False, "LIMITES_ACTIVOS": False,
+        "TAREAS_HILOS": 0, "CACHE_TTL": 0,
+    })
+    with sqlite3.connect(ruta) as db:
+        for i in range(categorias_extra):
+            categoria_id = db.execute("INSERT INTO categorias (nombre) VALUES (?)", (f"Extra {i}",)).lastrowid
+            db.executemany(
+                "INSERT INTO productos (nombre, precio, categoria_id) VALUES (?, ?, ?)",
+                [(f"Producto {i}-{j}", 10 + j, categoria_id) for j in range(3)]
+            )
+
+    # Cada conexión que entrega el pool anota lo que ejecuta
+    sentencias = []
+    pool = app.extensions["pool"]
+    obtener = pool.obtener
+
+    def obtener_con_traza():
+        conn = obtener()
+        conn.set_trace_callback(sentencias.append)
+        return conn
+    pool.obtener = obtener_con_traza
+
+    respuesta = app.test_client().get("/categorias")
+    pool.cerrar()
+    assert respuesta.status_code == 200
+    return respuesta.get_data(as_text=True), sentencias
+
+def test_categorias_cantidad_constante_de_consultas(tmp_path):
+    _, pocas = consultas_categorias(tmp_path / "pocas.db", 0)
+    html, muchas = consultas_categorias(tmp_path / "muchas.db", 50)
+    assert "Extra 49" in html
+    assert pocas
+    assert len(muchas) == len(pocas)
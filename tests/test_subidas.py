@@ -0,0 +1,54 @@
+import io
+import os
+import struct
+import zlib
+from werkzeug.datastructures import FileStorage
+from app import create_app
+from models.tareas import ejecutar_una, mantenimiento
+from utils.subidas import guardar_subida
+
+# ============================================================
+# Barrido de subidas sin referencias
+# ============================================================
+def png(ancho, alto, color):
+    """PNG RGB de un solo color, sin depender de Pillow."""
+    def bloque(tipo, datos):
+        return struct.pack(">I", len(datos)) + tipo + datos + struct.pack(">I", zlib.crc32(tipo + datos))
+    filas = b"".join(b"\x00" + bytes(color) * ancho for _ in range(alto))
+    return (b"\x89PNG\r\n\x1a\n"
+            + bloque(b"IHDR", struct.pack(">IIBBBBB", ancho, alto, 8, 2, 0, 0, 0))
+            + bloque(b"IDAT", zlib.compress(filas))
+            + bloque(b"IEND", b""))
+
+def subir(db, carpeta, nombre, color):
+    archivo = FileStorage(stream=io.BytesIO(png(4, 4, color)), filename=nombre)
+    return guardar_subida(db, archivo, carpeta, 1024 * 1024, 4096)
+
+def test_barrido_borra_huerfanos_vencidos(tmp_path):
+    carpeta = tmp_path / "imagenes"
+    carpeta.mkdir()
+    app = create_app({
+        "DATABASE": str(tmp_path / "x.db"), "UPLOAD_FOLDER": str(carpeta), "METRICAS": False,
+        "LIMITES_ACTIVOS": False, "TAREAS_HILOS": 0, "ARCHIVOS_GRACIA": 3600,
+    })
+    with app.app_context():
+        db = app.extensions["pool"].obtener()
+        huerfana = subir(db, str(carpeta), "a.png", (255, 0, 0))
+        usada = subir(db, str(carpeta), "b.png", (0, 0, 255))
+        db.execute("INSERT INTO productos (nombre, precio, img) VALUES ('Con imagen', 1, ?)", (usada,))
+        db.commit()
+
+        # Recién subida: la gracia la protege y no se encola nada
+        mantenimiento(db, gracia_archivos=3600)
+        assert ejecutar_una(db) is None
+
+        # Pasada la gracia, el mantenimiento encola el barrido sin que nadie edite
+        db.execute("UPDATE archivos SET creado = creado - 7200")
+        db.commit()
+        mantenimiento(db, gracia_archivos=3600)
+        assert ejecutar_una(db)[1] is True
+
+        assert not os.path.exists(carpeta / huerfana)
+        assert db.execute("SELECT 1 FROM archivos WHERE ruta = ?", (huerfana,)).fetchone() is None
+        assert os.path.exists(carpeta / usada)
+        app.extensions["pool"].devolver(db)
@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from flask import current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli solo se generan copias .gz
+    brotli = None
+
+# ============================================================
+# ASSETS ESTÁTICOS CON HUELLA (fingerprint) Y PRECOMPRIMIDOS
+# ============================================================
+# `flask assets` copia css/, js/ e imagenes/ a static/assets/ con el hash del
+# contenido en el nombre (index.css -> index.3f2a1b4c.css), genera .gz/.br
+# de los formatos de texto y escribe manifest.json. asset_url() traduce la
+# ruta original a la versión con huella, que se sirve con caché de un año.
+CARPETA_ASSETS = "assets"
+CARPETAS_ORIGEN = ("css", "js", "imagenes")
+EXCLUIR = {"derivados", "subidas"}  # Ya llevan el hash en el nombre
+COMPRIMIBLES = {".css", ".js", ".svg", ".json", ".txt", ".html"}
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+
+_manifiestos = {}
+
+def construir_manifiesto(static_folder):
+    destino = os.path.join(static_folder, CARPETA_ASSETS)
+    if os.path.isdir(destino):
+        shutil.rmtree(destino)
+    os.makedirs(destino)
+
+    manifiesto = {}
+    for carpeta in CARPETAS_ORIGEN:
+        raiz = os.path.join(static_folder, carpeta)
+        for directorio, subdirs, archivos in os.walk(raiz):
+            subdirs[:] = [d for d in subdirs if d not in EXCLUIR]
+            for archivo in sorted(archivos):
+                origen = os.path.join(directorio, archivo)
+                relativo = os.path.relpath(origen, static_folder).replace(os.sep, "/")
+                with open(origen, "rb") as f:
+                    contenido = f.read()
+                huella = hashlib.sha256(contenido).hexdigest()[:8]
+                base, ext = os.path.splitext(relativo)
+                con_huella = f"{CARPETA_ASSETS}/{base}.{huella}{ext}"
+
+                salida = os.path.join(static_folder, con_huella)
+                os.makedirs(os.path.dirname(salida), exist_ok=True)
+                with open(salida, "wb") as f:
+                    f.write(contenido)
+                if ext.lower() in COMPRIMIBLES:
+                    with open(salida + ".gz", "wb") as f:
+                        f.write(gzip.compress(contenido, compresslevel=9, mtime=0))
+                    if brotli is not None:
+                        with open(salida + ".br", "wb") as f:
+                            f.write(brotli.compress(contenido, quality=11))
+                manifiesto[relativo] = con_huella
+
+    with open(os.path.join(destino, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2, sort_keys=True)
+    return manifiesto
+
+def cargar_manifiesto(static_folder):
+    ruta = os.path.join(static_folder, CARPETA_ASSETS, "manifest.json")
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def asset_url(ruta):
+    """URL de un archivo de static/, con huella si está en el manifiesto."""
+    static_folder = current_app.static_folder
+    manifiesto = _manifiestos.get(static_folder)
+    if manifiesto is None:
+        manifiesto = _manifiestos[static_folder] = cargar_manifiesto(static_folder)
+    return url_for("static", filename=manifiesto.get(ruta, ruta))
+
+def servir_inmutable(carpeta, filename):
+    """Sirve un archivo con huella; usa la copia .br/.gz si el cliente la acepta."""
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    servido, codificacion, precomprimido = filename, None, False
+    for ext, nombre in ((".br", "br"), (".gz", "gzip")):
+        if os.path.isfile(os.path.join(carpeta, filename + ext)):
+            precomprimido = True
+            if codificacion is None and nombre in request.accept_encodings:
+                servido, codificacion = filename + ext, nombre
+
+    respuesta = send_from_directory(carpeta, servido, mimetype=mimetype, max_age=31536000)
+    respuesta.headers["Cache-Control"] = CACHE_INMUTABLE
+    if codificacion:
+        respuesta.headers["Content-Encoding"] = codificacion
+    if precomprimido:
+        respuesta.vary.add("Accept-Encoding")
+    return respuesta
+
+def registrar_assets(app):
+    static_folder = app.static_folder
+
+    @app.route("/static/assets/<path:filename>")
+    def assets_estaticos(filename):
+        return servir_inmutable(os.path.join(static_folder, CARPETA_ASSETS), filename)
+
+    # Los derivados de imágenes y las subidas también llevan el hash en el nombre
+    @app.route("/static/imagenes/derivados/<path:filename>")
+    def imagenes_derivadas(filename):
+        return servir_inmutable(os.path.join(static_folder, "imagenes", "derivados"), filename)
+
+    @app.route("/static/imagenes/subidas/<path:filename>")
+    def imagenes_subidas(filename):
+        return servir_inmutable(os.path.join(static_folder, "imagenes", "subidas"), filename)
+
+    @app.cli.command("assets")
+    def assets_command():
+        """Genera static/assets/ con nombres con huella y copias .gz/.br."""
+        manifiesto = construir_manifiesto(static_folder)
+        _manifiestos[static_folder] = manifiesto
+        print(f"Assets generados: {len(manifiesto)}")
+
+    app.add_template_global(asset_url)
@@ -1,5 +1,8 @@
+import hashlib
 from functools import wraps
-from flask import session, redirect, url_for
+from flask import session, redirect, url_for, request, make_response, Response
+from models.catalogo import quiere_json
+from models.db import get_db_lectura, get_cache
 
 def admin_required(f):
     @wraps(f)
@@ -16,3 +19,35 @@ def login_required(f):
             return redirect(url_for("auth.loginuser"))
         return f(*args, **kwargs)
     return wrapper
+
+def cache_pagina(f):
+    """Cachea el HTML de una vista pública y responde 304 si el ETag coincide.
+
+    La clave es (vista, query string, sesión iniciada o no); el ETag combina
+    la versión del catálogo con un hash del HTML generado.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if request.method != "GET" or quiere_json(request):
+            return f(*args, **kwargs)
+
+        cache = get_cache()
+        clave = ("pagina", request.endpoint, request.query_string,
+                 bool(session.get("user_email")))
+        pagina, generacion = cache.buscar(get_db_lectura(), clave)
+        if pagina is None:
+            respuesta = make_response(f(*args, **kwargs))
+            if respuesta.status_code != 200 or respuesta.is_streamed:
+                return respuesta
+            cuerpo = respuesta.get_data()
+            etag = "{}-{}".format(cache.version, hashlib.md5(cuerpo).hexdigest()[:16])
+            pagina = (cuerpo, respuesta.mimetype, etag)
+            cache.guardar(clave, pagina, generacion)
+
+        cuerpo, mimetype, etag = pagina
+        respuesta = Response(cuerpo, mimetype=mimetype)
+        respuesta.set_etag(etag)
+        respuesta.headers["Cache-Control"] = "no-cache"
+        respuesta.vary.add("Cookie")
+        return respuesta.make_conditional(request)
+    return wrapper
@@ -0,0 +1,34 @@
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+# ============================================================
+# CACHÉ DE FRAGMENTOS EN PLANTILLAS
+# ============================================================
+# Uso en una plantilla:
+#   {% cache "productos", request.endpoint, request.query_string %}
+#       ... HTML costoso de generar ...
+#   {% endcache %}
+# El HTML generado se guarda en environment.fragment_cache (un CacheCatalogo),
+# así que se invalida junto con el resto del catálogo.
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        partes = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            partes.append(parser.parse_expression())
+        cuerpo = parser.parse_statements(["name:endcache"], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_cache_support", [nodes.List(partes)]), [], [], cuerpo
+        ).set_lineno(lineno)
+
+    def _cache_support(self, partes, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        return cache.obtener(None, ("fragmento",) + tuple(partes), caller)
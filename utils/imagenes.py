@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+from flask import url_for
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow es opcional: sin él se sirven las imágenes originales
+    Image = None
+
+# ============================================================
+# DERIVADOS DE IMÁGENES (miniaturas, WebP, AVIF)
+# ============================================================
+logger = logging.getLogger("pixsoft.imagenes")
+
+ANCHOS = (160, 320, 640)
+CARPETA_DERIVADOS = "derivados"
+EXTENSIONES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".bmp"}
+
+def hash_archivo(ruta, tamano_bloque=1024 * 1024):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _formatos():
+    formatos = [("webp", "WEBP", {"quality": 80, "method": 4})]
+    if features.check("avif"):
+        formatos.append(("avif", "AVIF", {"quality": 60, "speed": 8}))
+    return formatos
+
+def generar_derivados(carpeta, nombre, anchos=ANCHOS):
+    """Genera versiones reducidas de `carpeta/nombre`.
+
+    Los archivos se nombran con el hash del contenido original, por lo que
+    volver a procesar la misma imagen no repite trabajo y las URLs nunca
+    cambian de contenido. Devuelve el dict de variantes, o None sin Pillow;
+    un archivo inexistente o que no es imagen lanza OSError/ValueError
+    (la cola de tareas lo cuenta como fallo y lo reintenta).
+    """
+    ruta = os.path.join(carpeta, nombre)
+    if Image is None:
+        return None
+
+    digest = hash_archivo(ruta)[:16]
+    destino = os.path.join(carpeta, CARPETA_DERIVADOS)
+    os.makedirs(destino, exist_ok=True)
+
+    with Image.open(ruta) as original:
+        original = ImageOps.exif_transpose(original)
+        ancho_original, alto_original = original.size
+        con_alfa = original.mode in ("RGBA", "LA", "P")
+
+        # Nunca ampliar: solo anchos menores que el original (o el original si es pequeño)
+        anchos = [a for a in anchos if a < ancho_original] or [ancho_original]
+        variantes = {"ancho": ancho_original, "alto": alto_original, "original": []}
+        formatos = _formatos()
+        for formato, _, _ in formatos:
+            variantes[formato] = []
+
+        for ancho in anchos:
+            alto = max(1, round(alto_original * ancho / ancho_original))
+            reducida = None
+
+            def guardar(ext, formato_pil, opciones):
+                nonlocal reducida
+                relativo = f"{CARPETA_DERIVADOS}/{digest}-{ancho}.{ext}"
+                ruta_destino = os.path.join(carpeta, relativo)
+                if not os.path.exists(ruta_destino):
+                    if reducida is None:
+                        reducida = original.convert("RGBA" if con_alfa else "RGB")
+                        reducida = reducida.resize((ancho, alto), Image.LANCZOS)
+                    reducida.save(ruta_destino, formato_pil, **opciones)
+                return relativo
+
+            for formato, formato_pil, opciones in formatos:
+                variantes[formato].append([ancho, guardar(formato, formato_pil, opciones)])
+            if con_alfa:
+                relativo = guardar("png", "PNG", {"optimize": True})
+            else:
+                relativo = guardar("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True})
+            variantes["original"].append([ancho, relativo])
+    return variantes
+
+def registrar_derivados(db, nombre, variantes):
+    db.execute(
+        "INSERT OR REPLACE INTO imagenes (nombre, variantes) VALUES (?, ?)",
+        (nombre, json.dumps(variantes, separators=(",", ":")))
+    )
+
+def procesar_imagen(db, carpeta, nombre):
+    """Genera y registra los derivados de una imagen recién subida."""
+    if not nombre:
+        return None
+    variantes = generar_derivados(carpeta, nombre)
+    if variantes is not None:
+        registrar_derivados(db, nombre, variantes)
+        db.commit()
+    return variantes
+
+def listar_imagenes(carpeta):
+    """Rutas relativas (con "/") de las imágenes de `carpeta`, incluidas las de subidas/."""
+    for raiz, carpetas, archivos in os.walk(carpeta):
+        if raiz == carpeta and CARPETA_DERIVADOS in carpetas:
+            carpetas.remove(CARPETA_DERIVADOS)
+        relativa = os.path.relpath(raiz, carpeta)
+        for nombre in archivos:
+            if os.path.splitext(nombre)[1].lower() in EXTENSIONES:
+                yield nombre if relativa == "." else f"{relativa}/{nombre}".replace(os.sep, "/")
+
+def backfill_derivados(db, carpeta, lote=50, forzar=False):
+    """Procesa las imágenes de `carpeta` que aún no tienen derivados."""
+    registradas = set()
+    if not forzar:
+        registradas = {fila[0] for fila in db.execute("SELECT nombre FROM imagenes")}
+    pendientes = sorted(nombre for nombre in listar_imagenes(carpeta) if nombre not in registradas)
+    procesadas = 0
+    for i, nombre in enumerate(pendientes, 1):
+        try:
+            variantes = generar_derivados(carpeta, nombre)
+        except (OSError, ValueError) as e:
+            logger.warning("No se pudo procesar la imagen %s: %s", nombre, e)
+            variantes = None
+        if variantes is not None:
+            registrar_derivados(db, nombre, variantes)
+            procesadas += 1
+        if i % lote == 0:
+            db.commit()
+    db.commit()
+    return procesadas
+
+def srcset(variantes, formato):
+    """Filtro Jinja: convierte las variantes guardadas en un atributo srcset."""
+    if not variantes:
+        return ""
+    if isinstance(variantes, str):
+        variantes = json.loads(variantes)
+    return ", ".join(
+        "{} {}w".format(url_for("static", filename="imagenes/" + ruta), ancho)
+        for ancho, ruta in variantes.get(formato, [])
+    )
@@ -0,0 +1,236 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, jsonify, request, session
+
+# ============================================================
+# LÍMITES DE PETICIONES (token bucket) Y CONCURRENCIA
+# ============================================================
+# Cada regla de LIMITES (login, buscar, ...) cubre uno o más endpoints,
+# opcionalmente solo cuando viene un parámetro (?q=), y tiene una cubeta
+# por IP y otra por usuario con sesión: `capacidad` fichas que se recargan
+# a `por_minuto`. Se toma una ficha de las dos o de ninguna; sin fichas se
+# responde 429 con Retry-After. Aparte, los endpoints de
+# CONCURRENCIA_ENDPOINTS comparten un tope de peticiones simultáneas por
+# proceso; lo que no entra se rechaza con 503 en vez de hacer cola en
+# SQLite. El backend "sqlite" comparte las cubetas entre procesos usando
+# un archivo propio, separado de la base principal.
+MAX_CLAVES_MEMORIA = 100_000
+LIMPIEZA_CADA = 1000  # Consultas entre limpiezas de cubetas llenas (SQLite)
+
+class CubetasMemoria:
+    """Cubetas del proceso actual (un worker = sus propios contadores)."""
+
+    def __init__(self, maximo=MAX_CLAVES_MEMORIA):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._cubetas = OrderedDict()  # clave -> [fichas, actualizado]
+
+    def consumir(self, claves, capacidad, por_segundo, costo=1.0):
+        """Toma `costo` de cada cubeta, o de ninguna si alguna no alcanza.
+
+        Devuelve (permitido, fichas de la cubeta más vacía).
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            cubetas = []
+            for clave in claves:
+                cubeta = self._cubetas.get(clave)
+                if cubeta is None:
+                    cubeta = self._cubetas[clave] = [capacidad, ahora]
+                else:
+                    self._cubetas.move_to_end(clave)
+                    cubeta[0] = min(capacidad, cubeta[0] + (ahora - cubeta[1]) * por_segundo)
+                    cubeta[1] = ahora
+                cubetas.append(cubeta)
+            # Las cubetas más viejas están llenas o casi: se pueden olvidar
+            while len(self._cubetas) > self.maximo:
+                self._cubetas.popitem(last=False)
+            fichas = min(cubeta[0] for cubeta in cubetas)
+            if fichas < costo:
+                return False, fichas
+            for cubeta in cubetas:
+                cubeta[0] -= costo
+            return True, fichas - costo
+
+    def estadisticas(self):
+        with self._lock:
+            return {"backend": "memoria", "cubetas": len(self._cubetas)}
+
+class CubetasSQLite:
+    """Cubetas compartidas entre procesos en un archivo SQLite aparte.
+
+    La recarga y el consumo van en una transacción BEGIN IMMEDIATE, así que
+    dos workers no pueden gastar la misma ficha. synchronous=OFF: perder
+    contadores en un corte de luz no importa.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._consultas = 0
+
+    def _conexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.ruta, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cubetas (
+                    clave TEXT PRIMARY KEY,
+                    fichas REAL NOT NULL,
+                    actualizado REAL NOT NULL,
+                    llena REAL NOT NULL  -- Momento en que vuelve a estar llena
+                ) WITHOUT ROWID
+            """)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def consumir(self, claves, capacidad, por_segundo, costo=1.0):
+        conn = self._conexion()
+        ahora = time.time()
+        parametros = {"capacidad": capacidad, "tasa": por_segundo, "ahora": ahora}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Primero se recargan todas; se descuenta solo si alcanzan todas
+            fichas = min(conn.execute("""
+                INSERT INTO cubetas (clave, fichas, actualizado, llena)
+                VALUES (:clave, :capacidad, :ahora, :ahora)
+                ON CONFLICT (clave) DO UPDATE SET
+                    fichas = MIN(:capacidad, fichas + (:ahora - actualizado) * :tasa),
+                    actualizado = :ahora
+                RETURNING fichas
+            """, dict(parametros, clave=clave)).fetchone()[0] for clave in claves)
+            permitido = fichas >= costo
+            conn.executemany("""
+                UPDATE cubetas SET fichas = fichas - :costo,
+                                   llena = :ahora + (:capacidad - fichas + :costo) / :tasa
+                WHERE clave = :clave
+            """, [dict(parametros, clave=clave, costo=costo if permitido else 0.0) for clave in claves])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._consultas += 1
+            limpiar = self._consultas % LIMPIEZA_CADA == 0
+        if limpiar:
+            # Una cubeta llena equivale a una que no existe
+            conn.execute("DELETE FROM cubetas WHERE llena < ?", (ahora,))
+        return permitido, fichas - costo if permitido else fichas
+
+    def estadisticas(self):
+        cubetas = self._conexion().execute("SELECT COUNT(*) FROM cubetas").fetchone()[0]
+        return {"backend": "sqlite", "cubetas": cubetas, "ruta": self.ruta}
+
+class Limitador:
+    def __init__(self, cubetas, reglas, concurrentes=(), maximo_concurrente=16):
+        self.cubetas = cubetas
+        self.reglas = {}  # endpoint -> [(nombre, capacidad, por_segundo, métodos, parámetro)]
+        for nombre, regla in reglas.items():
+            for endpoint in regla["endpoints"]:
+                self.reglas.setdefault(endpoint, []).append((
+                    nombre, float(regla["capacidad"]), regla["por_minuto"] / 60.0,
+                    set(regla.get("metodos") or ()), regla.get("parametro"),
+                ))
+        self.concurrentes = set(concurrentes)
+        self.maximo_concurrente = maximo_concurrente
+        self._semaforo = threading.BoundedSemaphore(maximo_concurrente)
+        self._lock = threading.Lock()
+        self._en_curso = 0
+        self._pico = 0
+        self._contadores = {}  # endpoint -> [permitidas, limitadas (429), rechazadas (503)]
+
+    def _contar(self, endpoint, i):
+        with self._lock:
+            self._contadores.setdefault(endpoint, [0, 0, 0])[i] += 1
+
+    def claves(self, nombre):
+        claves = [f"{nombre}|ip|{request.remote_addr}"]
+        if session.get("user_email"):
+            claves.append(f"{nombre}|usuario|{session['user_email']}")
+        return claves
+
+    def admitir(self):
+        """before_request: None si la petición sigue, o la respuesta de rechazo."""
+        endpoint = request.endpoint
+        limitada = False
+        for nombre, capacidad, por_segundo, metodos, parametro in self.reglas.get(endpoint, ()):
+            if metodos and request.method not in metodos:
+                continue
+            if parametro and not request.args.get(parametro, "").strip():
+                continue
+            limitada = True
+            permitido, fichas = self.cubetas.consumir(self.claves(nombre), capacidad, por_segundo)
+            if not permitido:
+                self._contar(endpoint, 1)
+                espera = math.ceil((1 - fichas) / por_segundo)
+                return rechazo(429, "Demasiadas solicitudes, intenta más tarde", espera)
+
+        if endpoint in self.concurrentes:
+            if not self._semaforo.acquire(blocking=False):
+                self._contar(endpoint, 2)
+                return rechazo(503, "Servidor ocupado, intenta en unos segundos", 1)
+            g._limite_concurrencia = True
+            with self._lock:
+                self._en_curso += 1
+                self._pico = max(self._pico, self._en_curso)
+        if limitada or endpoint in self.concurrentes:
+            self._contar(endpoint, 0)
+        return None
+
+    def liberar(self, exc=None):
+        if g.pop("_limite_concurrencia", False):
+            with self._lock:
+                self._en_curso -= 1
+            self._semaforo.release()
+
+    def estadisticas(self):
+        with self._lock:
+            por_endpoint = {
+                endpoint: {"permitidas": c[0], "limitadas": c[1], "rechazadas": c[2]}
+                for endpoint, c in sorted(self._contadores.items())
+            }
+            concurrencia = {"en_curso": self._en_curso, "pico": self._pico,
+                            "maximo": self.maximo_concurrente}
+        return {"cubetas": self.cubetas.estadisticas(), "concurrencia": concurrencia,
+                "endpoints": por_endpoint}
+
+    def totales(self):
+        """Contadores planos para /metrics."""
+        with self._lock:
+            return {
+                "permitidas": sum(c[0] for c in self._contadores.values()),
+                "limitadas": sum(c[1] for c in self._contadores.values()),
+                "rechazadas": sum(c[2] for c in self._contadores.values()),
+                "en_curso": self._en_curso,
+                "pico": self._pico,
+            }
+
+def rechazo(estado, mensaje, espera):
+    if request.path.startswith("/api/") or request.is_json or request.accept_mimetypes.best == "application/json":
+        respuesta = jsonify({"success": False, "error": mensaje})
+    else:
+        respuesta = current_app.response_class(mensaje, mimetype="text/plain")
+    respuesta.status_code = estado
+    respuesta.headers["Retry-After"] = str(max(1, int(espera)))
+    return respuesta
+
+def registrar_limites(app):
+    config = app.config
+    if config["LIMITES_BACKEND"] == "sqlite":
+        ruta = config["LIMITES_DATABASE"] or os.path.splitext(config["DATABASE"])[0] + "-limites.db"
+        cubetas = CubetasSQLite(ruta)
+    else:
+        cubetas = CubetasMemoria()
+    limitador = Limitador(cubetas, config["LIMITES"], config["CONCURRENCIA_ENDPOINTS"],
+                          config["CONCURRENCIA_MAXIMA"])
+    app.extensions["limites"] = limitador
+    app.before_request(limitador.admitir)
+    app.teardown_request(limitador.liberar)
+    return limitador
@@ -0,0 +1,94 @@
+import mimetypes
+import mmap
+import os
+from datetime import datetime, timezone
+from flask import abort, request, Response
+from werkzeug.http import http_date, is_resource_modified, parse_etags
+from werkzeug.security import safe_join
+
+# ============================================================
+# STREAMING DE MEDIOS CON SOPORTE DE RANGOS (video, audio)
+# ============================================================
+# Los reproductores piden el archivo por trozos (Range: bytes=N-M). Cada
+# respuesta envía solo ese trozo: con wsgi.file_wrapper (sendfile en
+# gunicorn) cuando el rango llega hasta el final del archivo, o leyendo
+# bloques de tamaño fijo de un mmap en otro caso. Así la memoria usada por
+# descarga no depende del tamaño del archivo.
+EXTENSIONES_MEDIA = {".mov", ".mp4", ".m4v", ".webm", ".ogg", ".mp3", ".wav"}
+TAMANO_BLOQUE = 256 * 1024
+
+def _leer_mmap(ruta, inicio, fin, tamano_bloque):
+    with open(ruta, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+        for posicion in range(inicio, fin, tamano_bloque):
+            yield datos[posicion:min(posicion + tamano_bloque, fin)]
+
+def servir_media(carpeta, filename, tamano_bloque=TAMANO_BLOQUE, max_age=86400):
+    ruta = safe_join(carpeta, filename)
+    if ruta is None or os.path.splitext(ruta)[1].lower() not in EXTENSIONES_MEDIA:
+        abort(404)
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        abort(404)
+
+    tamano = estado.st_size
+    modificado = datetime.fromtimestamp(int(estado.st_mtime), timezone.utc)
+    etag = "{:x}-{:x}".format(estado.st_mtime_ns, tamano)
+    cabeceras = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{etag}"',
+        "Last-Modified": http_date(modificado),
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+    mimetype = mimetypes.guess_type(ruta)[0] or "application/octet-stream"
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=modificado,
+                                ignore_if_range=True):
+        return Response(status=304, headers=cabeceras)
+
+    # If-Range: si el archivo cambió desde que el cliente pidió el primer
+    # trozo, se ignora el rango y se envía el archivo completo
+    rango = request.range
+    if rango is not None and "If-Range" in request.headers:
+        if_range = request.if_range
+        if if_range.etag is not None:
+            vigente = parse_etags(f'"{etag}"').contains(if_range.etag)
+        else:
+            vigente = if_range.date is not None and modificado <= if_range.date
+        if not vigente:
+            rango = None
+    # Varios rangos (multipart/byteranges) no se soportan: RFC 9110 permite
+    # ignorar el Range y enviar el archivo completo con 200
+    if rango is not None and len(rango.ranges) != 1:
+        rango = None
+
+    inicio, fin, estado_http = 0, tamano, 200
+    if rango is not None:
+        limites = rango.range_for_length(tamano)
+        if limites is None:
+            cabeceras["Content-Range"] = f"bytes */{tamano}"
+            return Response(status=416, headers=cabeceras)
+        inicio, fin = limites
+        estado_http = 206
+        cabeceras["Content-Range"] = f"bytes {inicio}-{fin - 1}/{tamano}"
+    cabeceras["Content-Length"] = str(fin - inicio)
+
+    if request.method == "HEAD" or fin == inicio:
+        cuerpo = []
+    else:
+        file_wrapper = request.environ.get("wsgi.file_wrapper")
+        if file_wrapper is not None and fin == tamano:
+            # El servidor puede usar sendfile desde la posición actual hasta el final
+            archivo = open(ruta, "rb")
+            archivo.seek(inicio)
+            cuerpo = file_wrapper(archivo, tamano_bloque)
+        else:
+            cuerpo = _leer_mmap(ruta, inicio, fin, tamano_bloque)
+
+    return Response(cuerpo, status=estado_http, headers=cabeceras, mimetype=mimetype,
+                    direct_passthrough=True)
+
+def registrar_media(app, carpeta):
+    @app.route("/media/<path:filename>", methods=["GET", "HEAD"])
+    def media(filename):
+        return servir_media(carpeta, filename)
@@ -0,0 +1,161 @@
+import bisect
+import hmac
+import threading
+import time
+from flask import Response, abort, current_app, g, request
+
+# ============================================================
+# MÉTRICAS (formato de texto de Prometheus en /metrics)
+# ============================================================
+# Por petición: latencia por endpoint (histograma), y cantidad, tiempo y
+# filas de las consultas SQL (ver models/instrumentacion.py). Todo vive en
+# memoria del proceso; con varios workers, Prometheus ve cada uno por
+# separado. Registrar una petición es una suma bajo un lock.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histograma:
+    __slots__ = ("cuentas", "suma", "total")
+
+    def __init__(self):
+        self.cuentas = [0] * len(BUCKETS)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        i = bisect.bisect_left(BUCKETS, valor)
+        if i < len(BUCKETS):
+            self.cuentas[i] += 1
+        self.suma += valor
+        self.total += 1
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.peticiones = {}  # (endpoint, metodo, estado) -> cantidad
+        self.latencias = {}   # endpoint -> Histograma
+        self.sql = {}         # endpoint -> [consultas, segundos, filas, lentas]
+
+    def registrar(self, endpoint, metodo, estado, segundos, db=None):
+        with self._lock:
+            clave = (endpoint, metodo, estado)
+            self.peticiones[clave] = self.peticiones.get(clave, 0) + 1
+            histograma = self.latencias.get(endpoint)
+            if histograma is None:
+                histograma = self.latencias[endpoint] = Histograma()
+            histograma.observar(segundos)
+            if db is not None and db.consultas:
+                sql = self.sql.setdefault(endpoint, [0, 0.0, 0, 0])
+                sql[0] += db.consultas
+                sql[1] += db.tiempo
+                sql[2] += db.filas
+                sql[3] += db.lentas
+
+    def exportar(self, extras=()):
+        with self._lock:
+            peticiones = dict(self.peticiones)
+            latencias = {k: (list(h.cuentas), h.suma, h.total) for k, h in self.latencias.items()}
+            sql = {k: list(v) for k, v in self.sql.items()}
+
+        lineas = [
+            "# HELP pixsoft_http_peticiones_total Peticiones atendidas.",
+            "# TYPE pixsoft_http_peticiones_total counter",
+        ]
+        for (endpoint, metodo, estado), n in sorted(peticiones.items()):
+            lineas.append(f'pixsoft_http_peticiones_total{{endpoint="{endpoint}",metodo="{metodo}",estado="{estado}"}} {n}')
+
+        lineas += [
+            "# HELP pixsoft_http_duracion_segundos Latencia de las peticiones por endpoint.",
+            "# TYPE pixsoft_http_duracion_segundos histogram",
+        ]
+        for endpoint, (cuentas, suma, total) in sorted(latencias.items()):
+            acumulado = 0
+            for limite, n in zip(BUCKETS, cuentas):
+                acumulado += n
+                lineas.append(f'pixsoft_http_duracion_segundos_bucket{{endpoint="{endpoint}",le="{limite}"}} {acumulado}')
+            lineas.append(f'pixsoft_http_duracion_segundos_bucket{{endpoint="{endpoint}",le="+Inf"}} {total}')
+            lineas.append(f'pixsoft_http_duracion_segundos_sum{{endpoint="{endpoint}"}} {suma:.6f}')
+            lineas.append(f'pixsoft_http_duracion_segundos_count{{endpoint="{endpoint}"}} {total}')
+
+        for i, (nombre, ayuda) in enumerate((
+            ("pixsoft_sql_consultas_total", "Consultas SQL ejecutadas."),
+            ("pixsoft_sql_duracion_segundos_total", "Tiempo en SQLite (ejecutar y leer filas)."),
+            ("pixsoft_sql_filas_total", "Filas leídas."),
+            ("pixsoft_sql_lentas_total", "Consultas sobre el umbral de SQL_LENTA_MS."),
+        )):
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} counter"]
+            for endpoint, valores in sorted(sql.items()):
+                valor = f"{valores[i]:.6f}" if i == 1 else valores[i]
+                lineas.append(f'{nombre}{{endpoint="{endpoint}"}} {valor}')
+
+        for nombre, ayuda, valores, contadores in extras:
+            # Solo valores numéricos (None antes de la primera sincronización,
+            # textos como el backend o la ruta quedan fuera); los acumulados
+            # van como counter con sufijo _total
+            numericos = sorted((etiqueta, valor) for etiqueta, valor in valores.items()
+                               if isinstance(valor, (int, float)) and not isinstance(valor, bool))
+            for tipo, sufijo, filas in (
+                ("gauge", "", [(e, v) for e, v in numericos if e not in contadores]),
+                ("counter", "_total", [(e, v) for e, v in numericos if e in contadores]),
+            ):
+                if not filas:
+                    continue
+                lineas += [f"# HELP {nombre}{sufijo} {ayuda}", f"# TYPE {nombre}{sufijo} {tipo}"]
+                for etiqueta, valor in filas:
+                    lineas.append(f'{nombre}{sufijo}{{dato="{etiqueta}"}} {valor}')
+        return "\n".join(lineas) + "\n"
+
+def _inicio_peticion():
+    g._inicio_peticion = time.perf_counter()
+
+def _fin_peticion(respuesta):
+    inicio = g.pop("_inicio_peticion", None)
+    if inicio is None:
+        return respuesta
+    segundos = time.perf_counter() - inicio
+    db = g.get("_database")
+    medida = db if hasattr(db, "consultas") else None
+    current_app.extensions["metricas"].registrar(
+        request.endpoint or "sin_ruta", request.method, respuesta.status_code, segundos, medida
+    )
+    if current_app.config["METRICAS_CABECERA"]:
+        if medida is not None:
+            respuesta.headers["X-Debug-SQL"] = f"consultas={medida.consultas}; tiempo_ms={medida.tiempo * 1000:.2f}"
+            respuesta.headers["Server-Timing"] = f"db;dur={medida.tiempo * 1000:.2f}, app;dur={segundos * 1000:.2f}"
+        else:
+            respuesta.headers["Server-Timing"] = f"app;dur={segundos * 1000:.2f}"
+    return respuesta
+
+def _error_peticion(exc=None):
+    # Excepciones no manejadas: after_request no corre, se registran como 500
+    if exc is not None and "_inicio_peticion" in g:
+        segundos = time.perf_counter() - g.pop("_inicio_peticion")
+        current_app.extensions["metricas"].registrar(request.endpoint or "sin_ruta", request.method, 500, segundos)
+
+def registrar_metricas(app):
+    app.extensions["metricas"] = Metricas()
+    app.before_request(_inicio_peticion)
+    app.after_request(_fin_peticion)
+    app.teardown_request(_error_peticion)
+
+    @app.route("/metrics")
+    def metrics():
+        token = app.config["METRICAS_TOKEN"]
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            abort(401)
+        extras = [
+            ("pixsoft_pool", "Estado del pool de conexiones.", app.extensions["pool"].estadisticas(),
+             {"checkouts", "esperas", "creadas", "descartadas"}),
+            ("pixsoft_cache", "Estado de la caché del catálogo.", app.extensions["cache_catalogo"].estadisticas(),
+             {"hits", "misses", "expulsiones", "invalidaciones"}),
+            ("pixsoft_tareas", "Tareas ejecutadas por los hilos de este proceso.", app.extensions["tareas"].estadisticas(),
+             {"hechas", "errores", "segundos"}),
+        ]
+        if "replica" in app.extensions:
+            extras.append(("pixsoft_replica", "Réplica de lectura del catálogo.",
+                           app.extensions["replica"].estadisticas(),
+                           {"refrescos", "sin_cambios", "errores", "lecturas", "en_principal"}))
+        if "limites" in app.extensions:
+            extras.append(("pixsoft_limites", "Peticiones admitidas y rechazadas por los límites.",
+                           app.extensions["limites"].totales(), {"permitidas", "limitadas", "rechazadas"}))
+        return Response(app.extensions["metricas"].exportar(extras),
+                        mimetype="text/plain; version=0.0.4")
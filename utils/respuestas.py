@@ -0,0 +1,53 @@
+import gzip
+import hashlib
+import json
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:  # Opcional: sin orjson se usa el json de la biblioteca estándar
+    orjson = None
+
+# ============================================================
+# RESPUESTAS JSON COMPACTAS (API del catálogo)
+# ============================================================
+# El cuerpo se serializa una vez (listas de tuplas, sin espacios) y se guarda
+# en la caché del catálogo junto con su versión gzip y su ETag; las
+# peticiones siguientes solo eligen la variante y responden 304 si pueden.
+GZIP_MINIMO = 512  # Bytes; por debajo comprimir no compensa
+GZIP_NIVEL = 6
+
+_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), check_circular=False)
+
+def codificar(datos):
+    """Serializa a bytes UTF-8; las tuplas salen como arreglos."""
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return _json.encode(datos).encode("utf-8")
+
+def preparar(datos, version):
+    """Devuelve (cuerpo, cuerpo_gzip o None, etag) listo para guardar en caché."""
+    cuerpo = codificar(datos)
+    comprimido = None
+    if len(cuerpo) >= GZIP_MINIMO:
+        comprimido = gzip.compress(cuerpo, compresslevel=GZIP_NIVEL, mtime=0)
+    etag = "{}-{}".format(version, hashlib.md5(cuerpo).hexdigest()[:16])
+    return cuerpo, comprimido, etag
+
+def respuesta_json(preparada, max_age=0):
+    cuerpo, comprimido, etag = preparada
+    respuesta = Response(mimetype="application/json")
+    if comprimido is not None and "gzip" in request.accept_encodings:
+        respuesta.set_data(comprimido)
+        respuesta.headers["Content-Encoding"] = "gzip"
+        etag += "-gz"  # Cada codificación es una representación distinta
+    else:
+        respuesta.set_data(cuerpo)
+    respuesta.set_etag(etag)
+    respuesta.vary.add("Accept-Encoding")
+    respuesta.cache_control.public = True
+    if max_age:
+        respuesta.cache_control.max_age = max_age
+    else:
+        respuesta.cache_control.no_cache = True
+    return respuesta.make_conditional(request)
@@ -0,0 +1,135 @@
+import glob
+import hashlib
+import os
+import tempfile
+import time
+
+try:
+    from PIL import Image
+except ImportError:  # Sin Pillow solo se valida el tipo por la cabecera, no las dimensiones
+    Image = None
+
+# ============================================================
+# SUBIDAS DE IMÁGENES (almacenamiento por contenido)
+# ============================================================
+# El archivo se copia por bloques a un temporal mientras se calcula su
+# sha256 y se corta apenas supera el máximo. El tipo sale de los primeros
+# bytes (no del nombre ni del Content-Type) y las dimensiones de la
+# cabecera: Image.open() no decodifica los píxeles. El nombre final es el
+# hash, así dos subidas iguales comparten archivo y cada URL es inmutable.
+CARPETA_SUBIDAS = "subidas"
+TAMANO_BLOQUE = 64 * 1024
+FORMATOS_PIL = {"png": "PNG", "jpg": "JPEG", "gif": "GIF", "webp": "WEBP", "avif": "AVIF"}
+
+class ImagenInvalida(ValueError):
+    pass
+
+def detectar_tipo(cabecera):
+    """Extensión según los "magic bytes" de la imagen, o None."""
+    if cabecera.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if cabecera.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if cabecera[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if cabecera[:4] == b"RIFF" and cabecera[8:12] == b"WEBP":
+        return "webp"
+    if cabecera[4:8] == b"ftyp" and cabecera[8:12] in (b"avif", b"avis"):
+        return "avif"
+    return None
+
+def _copiar(origen, destino, max_bytes):
+    h = hashlib.sha256()
+    total, cabecera = 0, b""
+    for bloque in iter(lambda: origen.read(TAMANO_BLOQUE), b""):
+        total += len(bloque)
+        if total > max_bytes:
+            raise ImagenInvalida(f"La imagen supera el máximo de {max_bytes // (1024 * 1024)} MB")
+        if len(cabecera) < 32:
+            cabecera += bloque[:32 - len(cabecera)]
+        h.update(bloque)
+        destino.write(bloque)
+    return h.hexdigest(), total, cabecera
+
+def _dimensiones(ruta, tipo):
+    if Image is None:
+        return None, None
+    try:
+        with Image.open(ruta, formats=[FORMATOS_PIL[tipo]]) as imagen:
+            return imagen.size
+    except Exception:
+        # Pillow sin soporte AVIF no puede leer la cabecera; el tipo ya se validó
+        if tipo == "avif":
+            return None, None
+        raise ImagenInvalida("El archivo no es una imagen válida") from None
+
+def guardar_subida(db, archivo, carpeta, max_bytes, max_lado):
+    """Guarda la imagen subida y devuelve su ruta relativa a `carpeta` (o None)."""
+    if not archivo or archivo.filename == "":
+        return None
+    temporales = os.path.join(carpeta, CARPETA_SUBIDAS)
+    os.makedirs(temporales, exist_ok=True)
+    # El temporal vive en la misma carpeta para que os.replace sea atómico
+    fd, temporal = tempfile.mkstemp(dir=temporales, suffix=".subiendo")
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            digest, total, cabecera = _copiar(archivo.stream, destino, max_bytes)
+        tipo = detectar_tipo(cabecera)
+        if tipo is None:
+            raise ImagenInvalida("Formato no soportado (usa PNG, JPG, GIF, WebP o AVIF)")
+        ancho, alto = _dimensiones(temporal, tipo)
+        if ancho is not None and max(ancho, alto) > max_lado:
+            raise ImagenInvalida(f"La imagen mide {ancho}x{alto}; el máximo es {max_lado} px por lado")
+
+        ruta = f"{CARPETA_SUBIDAS}/{digest[:2]}/{digest}.{tipo}"
+        # Primero la fila (renovando `creado`) y después el archivo: un barrido
+        # en curso bloquea este INSERT hasta terminar, y uno posterior ve la
+        # fecha nueva y no lo toca
+        db.execute("""
+            INSERT INTO archivos (hash, ruta, bytes, tipo, ancho, alto, creado)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (hash) DO UPDATE SET creado = excluded.creado
+        """, (digest, ruta, total, tipo, ancho, alto, time.time()))
+        db.commit()
+        final = os.path.join(carpeta, ruta)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(temporal, final)
+        return ruta
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+def barrer_archivos(db, carpeta, gracia=3600, lote=500):
+    """Borra los archivos sin referencias (y sus derivados) subidos hace más de `gracia` s.
+
+    Las subidas recientes se respetan porque el producto que las usa puede
+    no haberse guardado todavía. Devuelve la cantidad de archivos borrados.
+    """
+    borrados = 0
+    while True:
+        limite = time.time() - gracia
+        filas = db.execute(
+            "SELECT hash, ruta FROM archivos WHERE referencias <= 0 AND creado < ? LIMIT ?",
+            (limite, lote)
+        ).fetchall()
+        for digest, ruta in filas:
+            if not db.execute(
+                "DELETE FROM archivos WHERE hash = ? AND referencias <= 0 AND creado < ?",
+                (digest, limite)
+            ).rowcount:
+                continue
+            db.execute("DELETE FROM imagenes WHERE nombre = ?", (ruta,))
+            # Los derivados se nombran con los primeros 16 caracteres del mismo sha256
+            rutas = [os.path.join(carpeta, ruta)]
+            rutas += glob.glob(os.path.join(carpeta, "derivados", digest[:16] + "-*"))
+            for ruta_archivo in rutas:
+                try:
+                    os.remove(ruta_archivo)
+                except FileNotFoundError:
+                    pass
+            borrados += 1
+        # Se confirma con los archivos ya borrados: una subida igual espera
+        # este commit y vuelve a escribir el archivo después
+        db.commit()
+        if len(filas) < lote:
+            return borrados